@@ -0,0 +1,253 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+from db_connection import connect_to_db
+from data_access import load_bookings, pinned_data_version
+from features import DATE_COLUMNS, DERIVED_COLUMNS, FEATURE_COLUMNS, add_derived_columns, base_columns
+from cube import CUBE_KEYS, MEASURE_COLUMNS, load_cube
+from tracing import span
+
+'''
+Analysis definitions shared by the GUI pages.
+
+Every aggregate shown by the pages is a GROUP BY over the bookings table. Each one is declared once here as an
+`Analysis` (group keys + named metrics) and can be executed by three engines:
+
+- 'pandas': the needed columns are loaded through data_access.load_bookings() and aggregated in memory.
+- 'sql':    a GROUP BY query is generated and run on MySQL, so only the small result set reaches the client.
+- 'cube':   the aggregate is rolled up from the pre-aggregated booking_cube table (cube.py), whose size does not
+            depend on the number of bookings. Analyses the cube cannot answer, and every analysis until the cube has
+            been built or while MySQL is unreachable, run on the 'pandas' engine instead.
+
+Results are kept in a small LRU keyed by analysis, engine, date range and data version, so switching back and forth
+between options (e.g. the trend granularities) does not aggregate the bookings again until they change. The version
+is looked up once per view (data_access.pinned_data_version), and offline it is the cached one, so hits cost no
+round trip and keep working without MySQL.
+
+The default engine is taken from the HOTEL_ANALYSIS_ENGINE environment variable ('cube' when unset, which behaves
+like 'pandas' until the cube has been built). All engines return the same frame: one row per key combination,
+sorted by the keys, with the metric columns.
+'''
+
+ANALYSIS_ENGINE = os.environ.get('HOTEL_ANALYSIS_ENGINE', 'cube')
+RESULT_CACHE_SIZE = int(os.environ.get('HOTEL_RESULT_CACHE_SIZE', 64))
+
+SQL_FUNCTIONS = {'mean': 'AVG', 'sum': 'SUM', 'count': 'COUNT', 'min': 'MIN', 'max': 'MAX'}
+
+
+class Analysis:
+    def __init__(self, name, keys, metrics):
+        '''
+        Parameters:
+        - name (str): Identifier used in logs and caches.
+        - keys (list of str): Group-by columns (base or derived).
+        - metrics (dict): Output column -> (input column, aggregation), aggregation in SQL_FUNCTIONS.
+        '''
+        self.name = name
+        self.keys = keys
+        self.metrics = metrics
+
+    @property
+    def columns(self):
+        # Columns the pandas engine loads; cached features are loaded as they are, other derived columns as their inputs
+        needed = []
+        for column in self.keys + [column for column, _ in self.metrics.values()]:
+            for loaded in [column] if column in FEATURE_COLUMNS else base_columns([column]):
+                if loaded not in needed:
+                    needed.append(loaded)
+        return needed
+
+    @property
+    def derived_columns(self):
+        return [column for column in self.keys + [column for column, _ in self.metrics.values()] if column in DERIVED_COLUMNS]
+
+    def __repr__(self):
+        return f"Analysis({self.name!r})"
+
+
+TREND_METRICS = {
+    'bookings': ('is_canceled', 'count'),
+    'cancellations': ('is_canceled', 'sum'),
+    'average_nights': ('total_nights', 'mean'),
+}
+
+BASIC_STATISTICS = Analysis('basic_statistics', ['hotel'], {
+    'average_nights': ('total_nights', 'mean'),
+    'cancellation_rate': ('is_canceled', 'mean'),
+    'first_arrival': ('arrival_date', 'min'),
+    'last_arrival': ('arrival_date', 'max'),
+    'total_cancellations': ('is_canceled', 'sum'),
+    'total_bookings': ('is_canceled', 'count'),
+})
+
+MONTHLY_DISTRIBUTION = Analysis('monthly_distribution', ['hotel', 'arrival_date_month'], {'bookings': ('hotel', 'count')})
+SEASONAL_DISTRIBUTION = Analysis('seasonal_distribution', ['hotel', 'season'], {'bookings': ('hotel', 'count')})
+ROOM_TYPE_DISTRIBUTION = Analysis('room_type_distribution', ['hotel', 'reserved_room_type'], {'bookings': ('hotel', 'count')})
+CLIENT_DISTRIBUTION = Analysis('client_distribution', ['hotel', 'party_type'], {'bookings': ('hotel', 'count')})
+
+DAILY_TRENDS = Analysis('daily_trends', ['hotel', 'arrival_day'], TREND_METRICS)
+WEEKLY_TRENDS = Analysis('weekly_trends', ['hotel', 'arrival_week'], TREND_METRICS)
+MONTHLY_TRENDS = Analysis('monthly_trends', ['hotel', 'arrival_date'], TREND_METRICS)
+YEARLY_TRENDS = Analysis('yearly_trends', ['hotel', 'arrival_date_year'], TREND_METRICS)
+SEASONAL_TRENDS = Analysis('seasonal_trends', ['hotel', 'season'], TREND_METRICS)
+
+SEASONALITY = Analysis('seasonality', ['hotel', 'arrival_date_month'], {
+    'bookings': ('hotel', 'count'),
+    'cancellations': ('is_canceled', 'sum'),
+})
+
+
+def run_pandas(analysis, df):
+    if any(column not in df.columns for column in analysis.derived_columns):
+        # On a shallow copy, so a shared frame does not grow the derived columns
+        df = add_derived_columns(df.copy(deep=False), analysis.derived_columns)
+    return df.groupby(analysis.keys, observed=True).agg(**analysis.metrics).reset_index()
+
+def build_sql(analysis, date_min=None, date_max=None):
+    def expression(column):
+        return DERIVED_COLUMNS[column][2] if column in DERIVED_COLUMNS else column
+
+    select = [f"{expression(key)} AS {key}" for key in analysis.keys]
+    select += [f"{SQL_FUNCTIONS[func]}({expression(column)}) AS {name}" for name, (column, func) in analysis.metrics.items()]
+    query = f"SELECT {', '.join(select)} FROM bookings"
+    params = None
+    if date_min is not None and date_max is not None:
+        query += " WHERE arrival_date BETWEEN %s AND %s"
+        params = (pd.Timestamp(date_min).date(), pd.Timestamp(date_max).date())
+    query += f" GROUP BY {', '.join(analysis.keys)}"
+    return query, params
+
+def run_sql(analysis, date_min=None, date_max=None, connection=None):
+    query, params = build_sql(analysis, date_min, date_max)
+    own_connection = connection is None
+    if own_connection:
+        connection = connect_to_db()
+    with span('run_sql') as current:
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        result = pd.DataFrame(cursor.fetchall(), columns=analysis.keys + list(analysis.metrics))
+        cursor.close()
+        current.record(result)
+    if own_connection:
+        connection.close()
+
+    # MySQL hands back DECIMAL for AVG/SUM and DATE objects; align the types with the pandas engine
+    for name, (column, func) in analysis.metrics.items():
+        if column == 'arrival_date':
+            result[name] = pd.to_datetime(result[name])
+        elif func in ('mean', 'sum', 'count'):
+            result[name] = pd.to_numeric(result[name]).astype('float64' if func == 'mean' else 'int64')
+    for key in analysis.keys:
+        if key == 'arrival_date' or key in DATE_COLUMNS:
+            result[key] = pd.to_datetime(result[key])
+    return result
+
+def cube_supports(analysis):
+    # Keys must be cube dimensions; metrics counts, or sums/means of a cube measure, or min/max of a dimension
+    dimensions = CUBE_KEYS + ['season']
+    for column, func in analysis.metrics.values():
+        if func in ('sum', 'mean') and column not in MEASURE_COLUMNS:
+            return False
+        if func in ('min', 'max') and column not in dimensions:
+            return False
+    return all(key in dimensions for key in analysis.keys)
+
+def run_cube(analysis, cube):
+    grouped = cube.groupby(analysis.keys, observed=True)
+    sums = grouped[['bookings'] + list(MEASURE_COLUMNS.values())].sum()
+    result = pd.DataFrame(index=sums.index)
+    for name, (column, func) in analysis.metrics.items():
+        if func == 'count':
+            result[name] = sums['bookings']
+        elif func == 'sum':
+            result[name] = sums[MEASURE_COLUMNS[column]]
+        elif func == 'mean':
+            result[name] = sums[MEASURE_COLUMNS[column]] / sums['bookings']
+        else:
+            result[name] = grouped[column].agg(func)
+    return result.reset_index()
+
+def cube_frame(date_min=None, date_max=None, engine=None):
+    # The rollup cube for the range when the 'cube' engine is selected and the cube is current and reachable, None otherwise
+    if (engine or ANALYSIS_ENGINE) != 'cube':
+        return None
+    return load_cube(date_min, date_max)
+
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def run_analysis(analysis, date_min=None, date_max=None, df=None, engine=None):
+    """
+    Execute an analysis with the chosen engine.
+
+    Parameters:
+    - analysis (Analysis): What to compute.
+    - date_min, date_max: Optional arrival date range, applied only when both are given.
+    - df (DataFrame): Already loaded (and already range-filtered) bookings for the pandas engine. Loaded via
+      load_bookings() when omitted. Given rows are always aggregated directly, whatever the engine, and the result
+      is not cached.
+    - engine (str): 'pandas', 'sql' or 'cube'. Defaults to ANALYSIS_ENGINE.
+    """
+    engine = engine or ANALYSIS_ENGINE
+    if df is not None or not RESULT_CACHE_SIZE:
+        return _compute(analysis, date_min, date_max, df, engine)
+
+    ranged = date_min is not None and date_max is not None
+    # The version is looked up once (or taken from the enclosing view) and reused by the loads below
+    with pinned_data_version() as version:
+        if version is None:
+            return _compute(analysis, date_min, date_max, None, engine)
+        key = (analysis.name, engine, pd.Timestamp(date_min) if ranged else None, pd.Timestamp(date_max) if ranged else None,
+               version)
+        with _results_lock:
+            result = _results.get(key)
+            if result is not None:
+                _results.move_to_end(key)
+
+        if result is None:
+            result = _compute(analysis, date_min, date_max, None, engine)
+            with _results_lock:
+                _results[key] = result
+                while len(_results) > RESULT_CACHE_SIZE:
+                    _results.popitem(last=False)
+        else:
+            with span('run_analysis', analysis=analysis.name, engine=engine, cached=True) as current:
+                current.record(result)
+    # Callers add columns to what they get back
+    return result.copy()
+
+def _compute(analysis, date_min, date_max, df, engine):
+    with span('run_analysis', analysis=analysis.name, engine=engine) as current:
+        cube = None
+        if engine == 'cube':
+            cube = cube_frame(date_min, date_max, engine) if df is None and cube_supports(analysis) else None
+            if cube is None:
+                # Not answerable from the cube (or the cube has not been built or is unreachable): aggregate the raw rows
+                engine = 'pandas'
+                current.record(engine=engine)
+
+        if cube is not None:
+            with span('rollup', rows_in=len(cube)):
+                result = run_cube(analysis, cube)
+        elif engine == 'sql':
+            result = run_sql(analysis, date_min, date_max)
+        elif engine == 'pandas':
+            if df is None:
+                df = load_bookings(analysis.columns, date_min, date_max)
+            with span('groupby', rows_in=len(df)):
+                result = run_pandas(analysis, df)
+        else:
+            raise ValueError(f"Unknown analysis engine: {engine!r}")
+        current.record(result)
+
+    for key in analysis.keys:
+        # Plain labels on the keys so all engines sort and compare identically
+        if isinstance(result[key].dtype, pd.CategoricalDtype):
+            result[key] = result[key].astype(object)
+    return result.sort_values(analysis.keys, ignore_index=True)
+
+def clear_result_cache():
+    with _results_lock:
+        _results.clear()
@@ -0,0 +1,88 @@
+import os
+import threading
+import tkinter as tk
+from tracing import span
+
+'''
+Resized image assets for the GUI.
+
+Every window shows media/src/bg1.jpg stretched to its own size. Decoding the JPEG and resampling it with LANCZOS
+costs far more than drawing the window, so each resized copy is cached twice:
+
+- on disk, as a PNG under ASSET_CACHE_DIR (cache/assets by default, HOTEL_ASSET_CACHE_DIR to move it) named after
+  the source, the size and the source's mtime. Tk reads PNG files itself, so a cached background is shown without
+  importing PIL at all;
+- in memory, as the Tk PhotoImage, so windows of the same size opened later share one image.
+
+Editing or replacing the source image changes its mtime, which makes the old entries miss; they are deleted when
+the new copy is written.
+'''
+
+script_dir = os.path.dirname(__file__)
+ASSET_CACHE_DIR = os.environ.get('HOTEL_ASSET_CACHE_DIR', os.path.join(script_dir, 'cache', 'assets'))
+BACKGROUND = os.path.join(script_dir, 'media', 'src', 'bg1.jpg')
+
+_photos = {}
+_lock = threading.Lock()
+
+
+def _cache_path(source, size, mtime_ns):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(ASSET_CACHE_DIR, f"{stem}_{size[0]}x{size[1]}_{mtime_ns}.png")
+
+def _remove_stale(source, size, keep):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    prefix = f"{stem}_{size[0]}x{size[1]}_"
+    for name in os.listdir(ASSET_CACHE_DIR):
+        path = os.path.join(ASSET_CACHE_DIR, name)
+        if name.startswith(prefix) and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _write_resized(source, size, path):
+    # Only a cache miss pays for the PIL import
+    from PIL import Image
+    with span('resize_asset', file=os.path.basename(source), size=f"{size[0]}x{size[1]}") as current:
+        with Image.open(source) as image:
+            resized = image.convert('RGB').resize(size, Image.LANCZOS)
+        os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+        # Written under a temporary name first, so a concurrent reader never sees half a file
+        partial = f"{path}.{os.getpid()}.tmp"
+        resized.save(partial, format='PNG')
+        os.replace(partial, path)
+        current.record(bytes=os.path.getsize(path))
+    _remove_stale(source, size, path)
+
+def resized_image(size, source=BACKGROUND):
+    """
+    Return the path of a PNG holding `source` resized to `size`, creating it on the first request.
+
+    Parameters:
+    - size (tuple of int): (width, height) in pixels.
+    - source (str): Path of the original image.
+    """
+    size = (int(size[0]), int(size[1]))
+    path = _cache_path(source, size, os.stat(source).st_mtime_ns)
+    if not os.path.exists(path):
+        _write_resized(source, size, path)
+    return path
+
+def background_photo(master, size, source=BACKGROUND):
+    """
+    Return a Tk PhotoImage of `source` resized to `size`, shared by every window asking for the same size.
+
+    Parameters:
+    - master: Any widget of the Tk application the image is shown in.
+    - size (tuple of int): (width, height) in pixels.
+    - source (str): Path of the original image.
+    """
+    size = (int(size[0]), int(size[1]))
+    key = (master.tk, source, size, os.stat(source).st_mtime_ns)
+    with _lock:
+        photo = _photos.get(key)
+        if photo is None:
+            photo = tk.PhotoImage(master=master, file=resized_image(size, source))
+            _photos[key] = photo
+    return photo
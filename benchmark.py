@@ -0,0 +1,350 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import re
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import db_connection
+import analyses
+import cube
+import snapshot
+import tracing
+from db_connection import BOOKING_COLUMNS, MONTH_ORDER, insert_booking_data, upsert_summary_table, use_connection_factory
+from data_access import load_bookings, invalidate_bookings_cache
+from features import DERIVED_COLUMNS, OTHER_PARTY, PARTY_TYPES, SEASON_MAP, add_derived_columns, base_columns
+from views import VIEWS, booking_distribution_summary, view_columns
+from synthetic_bookings import generate_bookings, iter_bookings
+
+'''
+Scaling benchmark for every analysis path.
+
+Fills a local SQLite stand-in for the MySQL `bookings` table with synthetic bookings (synthetic_bookings.py) and
+runs every GUI view (page + option) through its stages, recording wall time and peak traced memory for each:
+
+- load:      cold load_bookings() of the view's columns (cache and snapshot cleared first); with the 'cube'
+             engine, a cold read of the rollup cube instead
+- derive:    the view's derived columns (total_nights, season, party_type) rebuilt from the base columns, the
+             work every cold load does once per data version (timed with every engine; the cube derives the same
+             columns when it aggregates new bookings); skipped for views that use none
+- aggregate: the view's data step (analysis and summary table)
+- render:    building the figure and rasterising it to PNG with Agg
+- upload:    upserting the summary table, for the pages that have one
+
+Before the views, the booking distribution summary (from the bookings and from the rollup cube) is checked against
+the per-hotel value_counts() it replaced, on the synthetic data and on a hand-made tie. After the views, DELTA_ROWS
+more bookings are inserted and the warm cache and rollup cube are brought up to date (page 'refresh'), which should
+cost in proportion to the new rows rather than the table.
+
+    python benchmark.py --rows 100000 1000000 10000000 --hotels 4 --output benchmark_results.json
+
+The stand-in is reached through db_connection.use_connection_factory(), so the real data layer code runs
+unchanged: MySQL-only syntax (%s placeholders, ON DUPLICATE KEY UPDATE) is translated on the fly and the generated
+arrival_date column is emulated with an SQLite generated column (and updated_at's ON UPDATE with a trigger). Absolute numbers therefore differ from a MySQL
+server; the results are meant for comparing revisions of this code on the same machine. Peak memory comes from
+tracemalloc (Python and numpy allocations), which slows the run down; --no-memory skips it.
+'''
+
+STAND_IN_SCHEMA = """
+CREATE TABLE bookings (
+    id INTEGER PRIMARY KEY,
+    {columns},
+    arrival_date TEXT GENERATED ALWAYS AS (
+        printf('%04d-%02d-01', arrival_date_year, CASE arrival_date_month {months} END)
+    ) STORED,
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX idx_bookings_hotel_arrival_date ON bookings (hotel, arrival_date);
+CREATE INDEX idx_bookings_updated_at ON bookings (updated_at);
+CREATE TRIGGER bookings_updated_at AFTER UPDATE ON bookings FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE bookings SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+END;
+""".format(
+    columns=',\n    '.join(BOOKING_COLUMNS),
+    months=' '.join(f"WHEN '{month}' THEN {number}" for number, month in enumerate(MONTH_ORDER, start=1))
+)
+
+DELTA_ROWS = 1000
+
+_UPSERT = re.compile(r"ON DUPLICATE KEY UPDATE (.*)$", re.S)
+
+
+_SQLITE_DAY = "date(arrival_date, '+' || (arrival_date_day_of_month - 1) || ' days')"
+
+# MySQL date expressions of features.DERIVED_COLUMNS -> SQLite; the week first, it contains the day
+_EXPRESSIONS = {
+    DERIVED_COLUMNS['arrival_week'][2]: f"date({_SQLITE_DAY}, '-' || ((CAST(strftime('%w', {_SQLITE_DAY}) AS INTEGER) + 6) % 7) || ' days')",
+    DERIVED_COLUMNS['arrival_day'][2]: _SQLITE_DAY,
+}
+
+
+def _translate(query):
+    # MySQL dialect used by db_connection/analyses -> SQLite
+    for mysql, sqlite in _EXPRESSIONS.items():
+        query = query.replace(mysql, sqlite)
+    query = query.replace('%s', '?')
+    upsert = _UPSERT.search(query)
+    if upsert:
+        assignments = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", upsert.group(1))
+        query = query[:upsert.start()] + f"ON CONFLICT DO UPDATE SET {assignments}"
+    return query
+
+def _adapt(params):
+    if params is None:
+        return ()
+    adapted = []
+    for value in params:
+        if isinstance(value, (datetime.date, pd.Timestamp)):
+            value = value.isoformat()
+        elif isinstance(value, np.generic):
+            value = value.item()
+        adapted.append(value)
+    return adapted
+
+
+class StandInCursor(sqlite3.Cursor):
+    def execute(self, query, params=None):
+        return super().execute(_translate(query), _adapt(params))
+
+    def executemany(self, query, rows):
+        return super().executemany(_translate(query), (_adapt(row) for row in rows))
+
+
+class StandInConnection(sqlite3.Connection):
+    def cursor(self, factory=StandInCursor):
+        return super().cursor(factory)
+
+
+def create_stand_in(path, rows, hotels, seed=0):
+    """
+    Create a SQLite stand-in database at `path` holding `rows` synthetic bookings and route connect_to_db() to it.
+    Returns the seconds spent inserting.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    use_connection_factory(lambda: sqlite3.connect(path, factory=StandInConnection, check_same_thread=False))
+    connection = db_connection.connect_to_db()
+    connection.executescript(STAND_IN_SCHEMA + ';'.join(list(db_connection.SUMMARY_TABLES.values()) + list(cube.CUBE_TABLES.values())))
+    connection.close()
+    # An empty cube, kept current by the inserts below
+    cube.refresh_cube()
+
+    started = time.perf_counter()
+    for chunk in iter_bookings(rows, hotels, seed, personal=False):
+        # Goes through the same batched INSERT path as insert_data_to_DB.py
+        insert_booking_data(chunk)
+    return time.perf_counter() - started
+
+
+class StageTimer:
+    def __init__(self, measure_memory=True):
+        self.measure_memory = measure_memory
+        self.results = []
+
+    def run(self, record, stage, func, *args):
+        if self.measure_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] - baseline if self.measure_memory else None
+        self.results.append(dict(record, stage=stage, seconds=round(seconds, 6), peak_bytes=peak))
+        return result
+
+
+def _cold_load(columns):
+    invalidate_bookings_cache()
+    analyses.clear_result_cache()
+    if os.path.exists(snapshot.SNAPSHOT_PATH):
+        os.remove(snapshot.SNAPSHOT_PATH)
+    return load_bookings(columns)
+
+def _cold_cube():
+    cube.invalidate_cube_cache()
+    analyses.clear_result_cache()
+    return cube.load_cube()
+
+def _render(plot, plot_data):
+    fig = plot(plot_data)
+    fig.savefig(io.BytesIO(), format='png')
+    return fig
+
+def _upload(data, table):
+    # Forget what this process wrote last, so every view pays for a real write
+    db_connection._summary_rows_written.pop(table, None)
+    return upsert_summary_table(data, table)
+
+SUMMARY_CHECK_COLUMNS = ['hotel', 'arrival_date_month', 'reserved_room_type', 'adults', 'children', 'babies']
+
+# Equal counts everywhere; the old summary picked the value seen first (March, A, the couple) as busiest and quietest
+TIE_BOOKINGS = pd.DataFrame({
+    'hotel': ['Resort Hotel'] * 4 + ['City Hotel'] * 2,
+    'arrival_date_month': ['March', 'January', 'January', 'March', 'July', 'December'],
+    'reserved_room_type': ['A', 'D', 'A', 'D', 'E', 'A'],
+    'adults': [2, 1, 1, 2, 2, 1],
+    'children': [0.0, 0.0, 0.0, 0.0, 1.0, 0.0],
+    'babies': [0, 0, 0, 0, 0, 0],
+})
+
+
+def reference_distribution_summary(df):
+    # The booking distribution summary as main_menu.BookingDist.get_max_min_data computed it, on plain string columns
+    df = df.astype({column: object for column in ['hotel', 'arrival_date_month', 'reserved_room_type']})
+    df['season'] = df['arrival_date_month'].map(SEASON_MAP)
+    kids = df['children'] + df['babies']
+    conditions = [(df['adults'] > 1) & (kids > 0), (df['adults'] > 1) & (kids == 0), (df['adults'] == 1) & (kids == 0)]
+    df['customer_type'] = np.select(conditions, PARTY_TYPES, default=OTHER_PARTY)
+
+    max_min_data = []
+    for hotel in df['hotel'].unique():
+        hotel_data = df[df['hotel'] == hotel]
+        row = [hotel]
+        for column in ['arrival_date_month', 'season', 'reserved_room_type']:
+            row += [hotel_data[column].value_counts().idxmax(), hotel_data[column].value_counts().idxmin()]
+        clients = hotel_data[hotel_data['customer_type'] != OTHER_PARTY]['customer_type']
+        row += [clients.value_counts().idxmax(), clients.value_counts().idxmin()] if not clients.empty else ['N/A', 'N/A']
+        max_min_data.append(row)
+    return pd.DataFrame(max_min_data, columns=['hotel', 'max_month', 'min_month', 'max_season', 'min_season',
+                                               'max_room_type', 'min_room_type', 'max_client_type', 'min_client_type'])
+
+def _check_summary(actual, expected, source):
+    try:
+        pd.testing.assert_frame_equal(actual.astype(object), expected.astype(object))
+    except AssertionError as error:
+        raise AssertionError(f"Booking distribution summary from {source} differs from value_counts():\n{error}") from None
+
+def check_distribution_summary():
+    # The hand-made tie, as raw rows and as shuffled pre-aggregated rows (ties must follow first_id, not row order)
+    expected = reference_distribution_summary(TIE_BOOKINGS)
+    _check_summary(booking_distribution_summary(TIE_BOOKINGS.copy()), expected, 'tied rows')
+    weighted = TIE_BOOKINGS.assign(bookings=1, first_id=np.arange(len(TIE_BOOKINGS))).iloc[::-1]
+    _check_summary(booking_distribution_summary(weighted, weight='bookings', first_seen='first_id'), expected, 'tied cube rows')
+
+    # The stand-in's bookings, aggregated directly and rolled up from the cube
+    expected = reference_distribution_summary(load_bookings(SUMMARY_CHECK_COLUMNS))
+    _check_summary(booking_distribution_summary(load_bookings(SUMMARY_CHECK_COLUMNS)), expected, 'bookings')
+    _check_summary(booking_distribution_summary(cube.load_cube(), weight='bookings', first_seen='first_id'), expected, 'cube')
+
+def benchmark_views(timer, rows, hotels):
+    for page, (data_step, options, table) in VIEWS.items():
+        for option, (analysis, plot, plot_file) in options.items():
+            record = {'rows': rows, 'hotels': hotels, 'page': page, 'option': option}
+            columns = view_columns(page, option)
+            derived = list(dict.fromkeys([column for column in columns if column in DERIVED_COLUMNS] + analysis.derived_columns))
+
+            if analyses.ANALYSIS_ENGINE == 'cube':
+                # The views read the rollup cube themselves; no bookings are loaded
+                timer.run(record, 'load', _cold_cube)
+                df = None
+            else:
+                df = timer.run(record, 'load', _cold_load, columns)
+            if derived:
+                # Warm cache: only the feature computation itself is timed
+                base = load_bookings(base_columns(derived))
+                timer.run(record, 'derive', add_derived_columns, base, derived)
+            data, plot_data = timer.run(record, 'aggregate', data_step, option, None, None, df)
+            timer.run(record, 'render', _render, plot, plot_data)
+            if table is not None:
+                timer.run(record, 'upload', _upload, data, table)
+
+            _print_stages(timer, record)
+
+def benchmark_refresh(timer, rows, hotels, seed):
+    # Append DELTA_ROWS bookings behind a warm cache and cube, then time bringing both up to date
+    record = {'rows': rows, 'hotels': hotels, 'page': 'refresh', 'option': f'+{DELTA_ROWS}'}
+    load_bookings()
+    cube.load_cube()
+    new_rows = generate_bookings(DELTA_ROWS, hotels, seed + 1, first_id=rows + 1, personal=False)
+    timer.run(record, 'insert', insert_booking_data, new_rows)
+    timer.run(record, 'load', load_bookings)
+    timer.run(record, 'cube', cube.load_cube)
+    _print_stages(timer, record)
+
+def _print_stages(timer, record):
+    stages = [result for result in timer.results if all(result[key] == value for key, value in record.items())]
+    print(f"{record['rows']:>10} {record['page']:<22} {record['option'] or '':<20} " + ' '.join(f"{result['stage']}={result['seconds']:.3f}s" for result in stages))
+
+@contextlib.contextmanager
+def _isolated(work_dir):
+    # Keep the benchmark's snapshots (and, unless HOTEL_TRACE_LOG is set, its traces) away from the real ones
+    saved = snapshot.SNAPSHOT_PATH, tracing.TRACE_LOG
+    snapshot.SNAPSHOT_PATH = os.path.join(work_dir, 'bookings.feather')
+    if 'HOTEL_TRACE_LOG' not in os.environ:
+        tracing.TRACE_LOG = ''
+    try:
+        yield
+    finally:
+        snapshot.SNAPSHOT_PATH, tracing.TRACE_LOG = saved
+        invalidate_bookings_cache()
+        cube.invalidate_cube_cache()
+        analyses.clear_result_cache()
+
+def run_benchmarks(sizes, hotels=2, seed=0, measure_memory=True, engine=None):
+    """
+    Run every view at each size and return the machine-readable report.
+
+    Parameters:
+    - sizes (list of int): Row counts of the stand-in bookings table.
+    - hotels (int): Number of hotels in the synthetic data.
+    - seed (int): Generator seed.
+    - measure_memory (bool): Record peak traced memory per stage.
+    - engine (str): Analysis engine ('pandas', 'sql' or 'cube'); analyses.ANALYSIS_ENGINE when omitted.
+    """
+    if engine:
+        analyses.ANALYSIS_ENGINE = engine
+    if measure_memory:
+        tracemalloc.start()
+    timer = StageTimer(measure_memory)
+    inserts = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix='hotel-benchmark-') as work_dir, _isolated(work_dir):
+            for rows in sizes:
+                database = os.path.join(work_dir, f'bookings_{rows}.sqlite')
+                inserts[rows] = round(create_stand_in(database, rows, hotels, seed), 6)
+                check_distribution_summary()
+                benchmark_views(timer, rows, hotels)
+                benchmark_refresh(timer, rows, hotels, seed)
+                os.remove(database)
+    finally:
+        use_connection_factory(None)
+        if measure_memory:
+            tracemalloc.stop()
+
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'engine': analyses.ANALYSIS_ENGINE,
+        'hotels': hotels,
+        'seed': seed,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'insert_seconds': inserts,
+        'results': timer.results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every analysis stage on synthetic bookings of growing size.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000], help="Row counts to benchmark, e.g. 100000 1000000 10000000")
+    parser.add_argument('--hotels', type=int, default=2, help="Number of hotels")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the generator")
+    parser.add_argument('--engine', choices=['pandas', 'sql', 'cube'], help="Analysis engine (default: HOTEL_ANALYSIS_ENGINE)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip peak memory tracking (faster, timings only)")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.rows, args.hotels, args.seed, not args.no_memory, args.engine)
+    with open(args.output, 'w', encoding='utf-8') as results_file:
+        json.dump(report, results_file, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
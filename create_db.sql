@@ -39,7 +39,80 @@ CREATE TABLE bookings (
     name VARCHAR(255),
     email VARCHAR(255),
     phone_number VARCHAR(255),
-    credit_card VARCHAR(255)
+    credit_card VARCHAR(255),
+    -- First day of the arrival month, derived once on write so readers never parse year/month strings
+    arrival_date DATE AS (
+        DATE_ADD(
+            MAKEDATE(arrival_date_year, 1),
+            INTERVAL FIELD(arrival_date_month, 'January', 'February', 'March', 'April', 'May', 'June',
+                'July', 'August', 'September', 'October', 'November', 'December') - 1 MONTH
+        )
+    ) STORED,
+    -- Last write to the row; lets readers that refresh incrementally (data_access.py, cube.py) detect updates
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_bookings_hotel_arrival_date (hotel, arrival_date),
+    INDEX idx_bookings_updated_at (updated_at)
+);
+
+-- Existing databases created before arrival_date was introduced can be upgraded in place with:
+--   ALTER TABLE bookings
+--       ADD COLUMN arrival_date DATE AS (DATE_ADD(MAKEDATE(arrival_date_year, 1), INTERVAL FIELD(arrival_date_month,
+--           'January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+--           'November', 'December') - 1 MONTH)) STORED,
+--       ADD INDEX idx_bookings_hotel_arrival_date (hotel, arrival_date);
+-- and for updated_at:
+--   ALTER TABLE bookings
+--       ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+--       ADD INDEX idx_bookings_updated_at (updated_at);
+
+CREATE TABLE basic_statistics (
+    hotel VARCHAR(255) NOT NULL,
+    average_nights DOUBLE,
+    cancellation_rate DOUBLE,
+    first_arrival DATETIME,
+    last_arrival DATETIME,
+    total_cancellations BIGINT,
+    total_bookings BIGINT,
+    cancellation_percentage DOUBLE,
+    PRIMARY KEY (hotel)
+);
+
+CREATE TABLE booking_distribution (
+    hotel VARCHAR(255) NOT NULL,
+    max_month TEXT,
+    min_month TEXT,
+    max_season TEXT,
+    min_season TEXT,
+    max_room_type TEXT,
+    min_room_type TEXT,
+    max_client_type TEXT,
+    min_client_type TEXT,
+    PRIMARY KEY (hotel)
+);
+
+-- Rollup of bookings per hotel x arrival month x room type x party type; built with `python cube.py` and kept current
+-- incrementally from the id watermark in booking_cube_state (see cube.py)
+CREATE TABLE booking_cube (
+    hotel VARCHAR(255) NOT NULL,
+    arrival_date DATE NOT NULL,
+    arrival_date_year INT NOT NULL,
+    arrival_date_month VARCHAR(16) NOT NULL,
+    reserved_room_type VARCHAR(32) NOT NULL,
+    party_type VARCHAR(64) NOT NULL,
+    bookings BIGINT NOT NULL,
+    cancellations BIGINT NOT NULL,
+    nights BIGINT NOT NULL,
+    first_id BIGINT NOT NULL,
+    PRIMARY KEY (hotel, arrival_date, reserved_room_type, party_type)
+);
+
+-- Cubes built before first_id was introduced are upgraded with the statement below, followed by `python cube.py`:
+--   ALTER TABLE booking_cube ADD COLUMN first_id BIGINT NOT NULL DEFAULT 0;
+
+CREATE TABLE booking_cube_state (
+    max_id BIGINT NOT NULL,
+    row_count BIGINT NOT NULL,
+    max_updated_at VARCHAR(32)
 );
 
 exit;
@@ -0,0 +1,226 @@
+import argparse
+import threading
+import time
+import pandas as pd
+from sqlalchemy.exc import DBAPIError
+from db_connection import connect_to_db, optimize_booking_dtypes
+from data_access import get_data_version, pinned_version, rows_added_since
+from features import DERIVED_COLUMNS, PARTY_CATEGORIES, add_derived_columns
+from tracing import span
+
+'''
+Pre-aggregated rollup of the bookings table, kept in MySQL.
+
+`booking_cube` holds one row per hotel x arrival month x reserved room type x party type with the number of
+bookings, cancellations and nights, and the id of its first booking. Every GUI analysis is a count/sum/mean over those dimensions (season is derived
+from the month), so the pages can be answered from this table, whose size depends on the number of hotels, months
+and room types but not on the number of bookings.
+
+- `refresh_cube()` (or `python cube.py`) rebuilds it from `bookings` in one INSERT ... SELECT.
+- `update_cube(connection)` brings a built cube up to date. When bookings were only appended since the cube's
+  watermark it adds just those rows (counts, sums and the arrival months are all mergeable), otherwise (deletes or
+  updates) it rebuilds the cube. db_connection's insert functions call it in the same transaction as their
+  INSERTs, and `load_cube()` calls it for changes made by any other writer.
+- `load_cube()` reads it (once per data version) for analyses.run_analysis(engine='cube'). It returns None when
+  the cube has never been built or MySQL is unreachable; the caller then falls back to the raw rows (and, offline,
+  to the bookings snapshot).
+
+`booking_cube_state` stores the watermark: the data version of `bookings` (MAX(id), COUNT(*), MAX(updated_at), see
+data_access.get_data_version) the cube reflects.
+'''
+
+CUBE_KEYS = ['hotel', 'arrival_date', 'arrival_date_year', 'arrival_date_month', 'reserved_room_type', 'party_type']
+CUBE_MEASURES = ['bookings', 'cancellations', 'nights']
+# Smallest booking id of each cell, so summaries can break ties by first appearance like the raw rows do
+CUBE_COLUMNS = CUBE_KEYS + CUBE_MEASURES + ['first_id']
+
+# Raw bookings column -> cube measure holding its sum
+MEASURE_COLUMNS = {'is_canceled': 'cancellations', 'total_nights': 'nights'}
+
+CUBE_TABLES = {
+    'booking_cube': """
+    CREATE TABLE IF NOT EXISTS booking_cube (
+        hotel VARCHAR(255) NOT NULL,
+        arrival_date DATE NOT NULL,
+        arrival_date_year INT NOT NULL,
+        arrival_date_month VARCHAR(16) NOT NULL,
+        reserved_room_type VARCHAR(32) NOT NULL,
+        party_type VARCHAR(64) NOT NULL,
+        bookings BIGINT NOT NULL,
+        cancellations BIGINT NOT NULL,
+        nights BIGINT NOT NULL,
+        first_id BIGINT NOT NULL,
+        PRIMARY KEY (hotel, arrival_date, reserved_room_type, party_type)
+    )
+    """,
+    'booking_cube_state': """
+    CREATE TABLE IF NOT EXISTS booking_cube_state (
+        max_id BIGINT NOT NULL,
+        row_count BIGINT NOT NULL,
+        max_updated_at VARCHAR(32)
+    )
+    """,
+}
+
+CUBE_SELECT = (
+    f"SELECT hotel, arrival_date, arrival_date_year, arrival_date_month, reserved_room_type, "
+    f"{DERIVED_COLUMNS['party_type'][2]} AS party_type, COUNT(*) AS bookings, SUM(is_canceled) AS cancellations, "
+    f"SUM({DERIVED_COLUMNS['total_nights'][2]}) AS nights, MIN(id) AS first_id "
+    f"FROM bookings WHERE id > %s AND id <= %s "
+    f"GROUP BY {', '.join(CUBE_KEYS)}"
+)
+
+_cube_cache = {'version': None, 'df': None}
+_cube_lock = threading.Lock()
+_tables_created = False
+
+
+def _create_tables(cursor):
+    # Once per process, like the summary tables
+    global _tables_created
+    if not _tables_created:
+        for ddl in CUBE_TABLES.values():
+            cursor.execute(ddl)
+        _tables_created = True
+
+def _read_state(cursor):
+    cursor.execute("SELECT max_id, row_count, max_updated_at FROM booking_cube_state")
+    row = cursor.fetchone()
+    return None if row is None else (int(row[0]), int(row[1]), row[2])
+
+def _rebuild(cursor, version):
+    cursor.execute("DELETE FROM booking_cube")
+    cursor.execute("DELETE FROM booking_cube_state")
+    cursor.execute(f"INSERT INTO booking_cube ({', '.join(CUBE_COLUMNS)}) {CUBE_SELECT}", (0, version[0]))
+    cursor.execute("INSERT INTO booking_cube_state (max_id, row_count, max_updated_at) VALUES (%s, %s, %s)", version)
+
+def refresh_cube(connection=None):
+    """
+    Rebuild booking_cube from the whole bookings table. Returns the number of cube rows.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = connect_to_db()
+    with span('refresh_cube') as current:
+        version = get_data_version(connection)
+        cursor = connection.cursor()
+        _create_tables(cursor)
+        _rebuild(cursor, version)
+        connection.commit()
+        cursor.execute("SELECT COUNT(*) FROM booking_cube")
+        cube_rows = cursor.fetchone()[0]
+        cursor.close()
+        current.record(rows=cube_rows, bookings=version[1])
+    if own_connection:
+        connection.close()
+    invalidate_cube_cache()
+    return cube_rows
+
+def update_cube(connection):
+    """
+    Bring a built booking_cube up to date with bookings, on the caller's transaction (the caller commits).
+
+    Only the bookings above the cube's id watermark are aggregated when nothing at or below it changed; deletes and
+    updates trigger a full rebuild. Does nothing when the cube has never been built. Returns the number of bookings
+    aggregated.
+    """
+    with span('update_cube') as current:
+        cursor = connection.cursor()
+        _create_tables(cursor)
+        state = _read_state(cursor)
+        version = get_data_version(connection) if state is not None else None
+        if state is None or state == version:
+            cursor.close()
+            current.record(rows=0, skipped=state is None)
+            return 0
+
+        added = rows_added_since(connection, state, version)
+        if added is None:
+            current.record(rebuilt=True)
+            _rebuild(cursor, version)
+            added = version[1]
+        else:
+            # Appended rows have higher ids, so first_id of an existing cell stays as it is
+            cursor.execute(
+                f"INSERT INTO booking_cube ({', '.join(CUBE_COLUMNS)}) {CUBE_SELECT} "
+                f"ON DUPLICATE KEY UPDATE {', '.join(f'{measure} = {measure} + VALUES({measure})' for measure in CUBE_MEASURES)}",
+                (state[0], version[0])
+            )
+            cursor.execute("UPDATE booking_cube_state SET max_id = %s, row_count = %s, max_updated_at = %s", version)
+        cursor.close()
+        current.record(rows=added)
+    return added
+
+def _read_cube(connection):
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT {', '.join(CUBE_COLUMNS)} FROM booking_cube")
+    df = pd.DataFrame(cursor.fetchall(), columns=CUBE_COLUMNS)
+    cursor.close()
+
+    df = optimize_booking_dtypes(df)
+    df['arrival_date'] = pd.to_datetime(df['arrival_date'])
+    df['party_type'] = pd.Categorical(df['party_type'], categories=PARTY_CATEGORIES)
+    for measure in CUBE_MEASURES + ['first_id']:
+        df[measure] = pd.to_numeric(df[measure]).astype('int64')
+    return add_derived_columns(df, ['season'])
+
+def load_cube(date_min=None, date_max=None):
+    """
+    Return the rollup cube as a DataFrame (CUBE_COLUMNS and season), brought up to date with bookings
+    first, or None when it has never been built or MySQL cannot be reached.
+
+    Parameters:
+    - date_min, date_max: Optional arrival date range, applied only when both are given.
+    """
+    with _cube_lock, span('load_cube', source='cache') as current:
+        # Already holding the version this view was pinned to (data_access.pinned_data_version): no round trip
+        pinned = pinned_version()
+        if pinned is None or _cube_cache['version'] != pinned:
+            try:
+                connection = connect_to_db()
+            except DBAPIError:
+                # Offline: the caller aggregates the bookings snapshot instead
+                current.record(source='unreachable')
+                return None
+            try:
+                cursor = connection.cursor()
+                _create_tables(cursor)
+                state = _read_state(cursor)
+                cursor.close()
+                if state is None:
+                    current.record(source='not built')
+                    return None
+                if state != get_data_version(connection):
+                    # Written by something that did not maintain the cube (or rows were deleted or updated)
+                    update_cube(connection)
+                    connection.commit()
+                    cursor = connection.cursor()
+                    state = _read_state(cursor)
+                    cursor.close()
+                if _cube_cache['version'] != state:
+                    current.record(source='mysql')
+                    _cube_cache['df'] = _read_cube(connection)
+                    _cube_cache['version'] = state
+            finally:
+                connection.close()
+        df = _cube_cache['df']
+        if date_min is not None and date_max is not None:
+            df = df[df['arrival_date'].between(pd.Timestamp(date_min), pd.Timestamp(date_max))]
+        current.record(df)
+    return df
+
+def invalidate_cube_cache():
+    with _cube_lock:
+        _cube_cache['version'] = None
+        _cube_cache['df'] = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the booking_cube rollup table from bookings.")
+    parser.parse_args()
+
+    started = time.perf_counter()
+    cube_rows = refresh_cube()
+    print(f"booking_cube rebuilt: {cube_rows} rows in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
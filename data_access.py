@@ -0,0 +1,232 @@
+import contextlib
+import threading
+import pandas as pd
+from sqlalchemy.exc import DBAPIError
+from db_connection import connect_to_db, retrieve_booking_data, ANALYSIS_COLUMNS
+from features import FEATURE_COLUMNS, add_derived_columns, base_columns, derive_features
+from snapshot import load_snapshot, save_snapshot, snapshot_version
+from tracing import span, current_span
+
+'''
+Shared data access layer for the GUI pages.
+
+The analysis columns of the bookings table (see db_connection.ANALYSIS_COLUMNS) are read once per process with
+compact dtypes and kept in memory, together with the derived features (features.py: total_nights, season,
+party_type) computed once for that data version. Personal data columns are never loaded.
+
+Every request first asks MySQL for a cheap data version: (MAX(id), COUNT(*), MAX(updated_at)), all served from
+indexes. When it differs from the cached one and the change is only new rows (no id at or below the cached
+watermark was deleted or updated since), just the rows with `id > watermark` are read, given their features and
+appended to the cached frame, so refreshing costs in proportion to the new rows. Deletes and updates are detected
+from the row count and `updated_at` and trigger a full re-read.
+
+On a cold cache the local snapshot (snapshot.py) is used whenever the database only grew since it was written; the
+missing rows are appended the same way and the snapshot is rewritten. Every full read from MySQL refreshes it too.
+If MySQL is unreachable the snapshot is served regardless of its version.
+
+A view (render_cache.cached_view, views.build_view) looks the data version up once inside `pinned_data_version()`;
+the result caches on that thread key on it instead of asking MySQL again, and load_bookings() and cube.load_cube()
+serve their in-memory frames without a connection when they already hold that version. Offline the pinned version
+is the cached (or snapshot) one, so the caches keep serving.
+
+Writers that change `bookings` in the same process (e.g. insert_data_to_DB.py) can call
+`invalidate_bookings_cache()` to force the next read to go to the database.
+'''
+
+_cache = {'version': None, 'df': None}
+_cache_lock = threading.Lock()
+_pinned = threading.local()
+
+
+def _version_value(value):
+    # Plain JSON-friendly values, so versions can be stored with the snapshot and the rollup cube
+    return value.isoformat(sep=' ', timespec='microseconds') if hasattr(value, 'isoformat') else value
+
+def get_data_version(connection):
+    with span('get_data_version'):
+        cursor = connection.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0), COUNT(*), MAX(updated_at) FROM bookings")
+        version = tuple(_version_value(value) for value in cursor.fetchone())
+        cursor.close()
+    return version
+
+def rows_added_since(connection, old_version, new_version):
+    """
+    Number of bookings appended between two data versions, or None when rows at or below the old id watermark were
+    deleted or updated in between (or the old version predates updated_at), so only a full rebuild is correct.
+    """
+    if old_version is None or len(old_version) != len(new_version):
+        return None
+    old_max_id, old_count, old_updated_at = old_version
+    new_max_id, new_count, _ = new_version
+    with span('rows_added_since') as current:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM bookings WHERE id > %s AND id <= %s", (old_max_id, new_max_id))
+        added = cursor.fetchone()[0]
+        changed = 0
+        if old_updated_at is not None:
+            cursor.execute("SELECT COUNT(*) FROM bookings WHERE updated_at > %s AND id <= %s", (old_updated_at, old_max_id))
+            changed = cursor.fetchone()[0]
+        cursor.close()
+        current.record(rows=added, changed=changed)
+    # Fewer rows than old + added means deletes; anything touched below the watermark means updates
+    if changed or new_count != old_count + added:
+        return None
+    return added
+
+def append_rows(df, new_rows):
+    # Concatenate keeping the categoricals: unordered categories become the sorted union, as a full read would give
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype) and not df[column].cat.ordered:
+            categories = df[column].cat.categories.union(new_rows[column].cat.categories)
+            df[column] = df[column].cat.set_categories(categories)
+            new_rows[column] = new_rows[column].cat.set_categories(categories)
+    return pd.concat([df, new_rows], ignore_index=True)
+
+def _catch_up(connection, version):
+    # Append the rows between the cached watermark and `version`; False when a full rebuild is needed instead
+    if rows_added_since(connection, _cache['version'], version) is None:
+        return False
+    with span('append_new_rows') as current:
+        new_rows = retrieve_booking_data(ANALYSIS_COLUMNS, connection, after_id=_cache['version'][0], max_id=version[0])
+        _cache['df'] = append_rows(_cache['df'], derive_features(new_rows))
+        _cache['version'] = version
+        current.record(new_rows)
+    return True
+
+def _refresh_cache(connection, version, ranged):
+    # Returns False when a ranged request should rather be pushed down to MySQL than fill the whole cache
+    from_snapshot = False
+    stored = snapshot_version(columns=ANALYSIS_COLUMNS) if _cache['df'] is None else None
+    if stored is not None:
+        if stored == version or rows_added_since(connection, stored, version) is not None:
+            current_span().record(source='snapshot')
+            _cache['df'] = derive_features(load_snapshot(ANALYSIS_COLUMNS))
+            _cache['version'] = stored
+            if stored == version:
+                return True
+            from_snapshot = True
+
+    if _cache['df'] is not None:
+        if _catch_up(connection, version):
+            if from_snapshot:
+                save_snapshot(_cache['df'][ANALYSIS_COLUMNS], version)
+            else:
+                current_span().record(source='mysql delta')
+            return True
+        # Rows were deleted or updated: drop the stale frame before reading everything again
+        _cache['df'] = None
+        _cache['version'] = None
+    if ranged:
+        return False
+
+    current_span().record(source='mysql')
+    # Bounded by the version's watermark, so rows inserted meanwhile are picked up by the next delta exactly once
+    df = retrieve_booking_data(ANALYSIS_COLUMNS, connection, max_id=version[0])
+    # The snapshot keeps the base columns only; the features are rebuilt from them
+    save_snapshot(df, version)
+    _cache['df'] = derive_features(df)
+    _cache['version'] = version
+    return True
+
+def load_bookings(columns=None, date_min=None, date_max=None):
+    """
+    Return the bookings as a DataFrame, served from the process-wide cache when it is up to date.
+
+    Parameters:
+    - columns (list of str): Subset of ANALYSIS_COLUMNS and FEATURE_COLUMNS the caller needs. All of them when
+      omitted.
+    - date_min, date_max: Optional arrival date range, applied only when both are given. With a warm cache (or a
+      current snapshot) the range is sliced from memory on the precomputed `arrival_date` column; otherwise it is
+      pushed down into the WHERE clause and only the matching rows are read.
+
+    A copy is returned so pages can add columns without touching the shared frame.
+    """
+    with span('load_bookings', source='cache') as current:
+        df = _load_bookings(columns or ANALYSIS_COLUMNS + FEATURE_COLUMNS, date_min, date_max)
+        current.record(df)
+    return df
+
+def _load_bookings(columns, date_min, date_max):
+    ranged = date_min is not None and date_max is not None
+    pinned = pinned_version()
+    with _cache_lock:
+        # Already holding the version this view was pinned to: served without a round trip
+        if pinned is None or _cache['df'] is None or _cache['version'] != pinned:
+            try:
+                connection = connect_to_db()
+            except DBAPIError:
+                # Offline: fall back to whatever we have, the in-memory frame first
+                if _cache['df'] is None:
+                    stored = snapshot_version(columns=ANALYSIS_COLUMNS)
+                    if stored is None:
+                        raise
+                    print("MySQL is unreachable, using the local bookings snapshot")
+                    current_span().record(source='offline snapshot')
+                    _cache['df'] = derive_features(load_snapshot(ANALYSIS_COLUMNS))
+                    _cache['version'] = stored
+            else:
+                try:
+                    version = get_data_version(connection)
+                    if _cache['df'] is None or _cache['version'] != version:
+                        if not _refresh_cache(connection, version, ranged):
+                            current_span().record(source='mysql range')
+                            df = retrieve_booking_data(base_columns(columns), connection, date_min, date_max)
+                            return add_derived_columns(df, columns)[columns]
+                finally:
+                    connection.close()
+        df = _cache['df']
+
+    if ranged:
+        df = df[df['arrival_date'].between(pd.Timestamp(date_min), pd.Timestamp(date_max))]
+    return df[columns].copy()
+
+def invalidate_bookings_cache():
+    with _cache_lock:
+        _cache['version'] = None
+        _cache['df'] = None
+
+def cached_data_version():
+    return _cache['version']
+
+def _offline_version():
+    # What the caches can still serve without MySQL: the in-memory frame's version, else the snapshot's
+    return _cache['version'] or snapshot_version(columns=ANALYSIS_COLUMNS)
+
+def _lookup_data_version():
+    try:
+        connection = connect_to_db()
+    except DBAPIError:
+        return _offline_version()
+    try:
+        return get_data_version(connection)
+    except DBAPIError:
+        return _offline_version()
+    finally:
+        connection.close()
+
+def current_data_version():
+    # The version of bookings right now (the pinned one inside pinned_data_version()), or the cached or snapshot
+    # one when MySQL is unreachable
+    if hasattr(_pinned, 'version'):
+        return _pinned.version
+    return _lookup_data_version()
+
+def pinned_version():
+    # The version pinned on this thread, None outside pinned_data_version() (or when it is unknown)
+    return getattr(_pinned, 'version', None)
+
+@contextlib.contextmanager
+def pinned_data_version():
+    """
+    Look the data version up once and reuse it for every cache key and read on this thread inside the block.
+    Nested blocks reuse the outer version. Yields the version, None when it is unknown (offline without a snapshot).
+    """
+    if hasattr(_pinned, 'version'):
+        yield _pinned.version
+        return
+    _pinned.version = _lookup_data_version()
+    try:
+        yield _pinned.version
+    finally:
+        del _pinned.version
@@ -0,0 +1,147 @@
+from tkinter import ttk
+
+'''
+Scrollable, sortable table widget for DataFrames.
+
+DataTable shows a DataFrame in a ttk.Treeview, but Tk only ever holds the rows that fit in the widget: `height`
+Treeview items are created once, and scrolling (scrollbar, mouse wheel, arrow and page keys) just writes the values
+of the rows now in view into them. Showing a breakdown of thousands of rows (per country, market segment or agent)
+therefore costs the same as showing two hotels, and only the visible cells are ever formatted.
+
+- Click a heading to sort by that column, click again to reverse. Sorting reorders row positions in pandas; no Tk
+  items are moved.
+- Drag the separators between headings to resize the columns.
+
+    table = DataTable(parent, [Column('hotel', 'Ξενοδοχείο'), Column('total_bookings', 'Κρατήσεις', 120)])
+    table.grid(row=1, column=0)
+    table.set_data(basic_stats)
+'''
+
+ROW_HEIGHT = 28
+WHEEL_ROWS = 3
+
+
+class Column:
+    def __init__(self, key, heading, width=140, format=str, anchor='center'):
+        '''
+        Parameters:
+        - key (str): DataFrame column shown.
+        - heading (str): Heading text.
+        - width (int): Initial width in pixels; the user may resize it.
+        - format (callable): Value -> cell text; missing values are shown empty.
+        - anchor (str): Tk anchor of the cell text.
+        '''
+        self.key = key
+        self.heading = heading
+        self.width = width
+        self.format = format
+        self.anchor = anchor
+
+
+def _is_missing(value):
+    # NaN/NaT are the only values not equal to themselves; pd.NA cannot even be compared
+    try:
+        return value is None or bool(value != value)
+    except TypeError:
+        return True
+
+
+class DataTable(ttk.Frame):
+    def __init__(self, master, columns, height=8, **frame_options):
+        super().__init__(master, **frame_options)
+        self.columns = columns
+        self.height = height
+        self._frame = None
+        self._order = []
+        self._first = 0
+        self._sort_key = None
+        self._ascending = True
+
+        style = ttk.Style(self)
+        style.configure('DataTable.Treeview', rowheight=ROW_HEIGHT, font=("Helvetica", 11))
+        style.configure('DataTable.Treeview.Heading', font=("Helvetica", 12, "bold"))
+
+        self.tree = ttk.Treeview(self, columns=[column.key for column in columns], show='headings', height=height,
+                                 selectmode='none', style='DataTable.Treeview')
+        for column in columns:
+            self.tree.heading(column.key, text=column.heading, command=lambda key=column.key: self.sort(key))
+            self.tree.column(column.key, width=column.width, minwidth=40, anchor=column.anchor, stretch=False)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        # The Treeview never scrolls itself: it holds exactly the visible rows
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self._on_wheel)
+        for sequence, rows in (('<Up>', -1), ('<Down>', 1), ('<Prior>', -height), ('<Next>', height)):
+            self.tree.bind(sequence, lambda event, rows=rows: self.scroll_to(self._first + rows))
+        self.tree.bind('<Home>', lambda event: self.scroll_to(0))
+        self.tree.bind('<End>', lambda event: self.scroll_to(len(self._order)))
+        self.tree.bind('<Enter>', lambda event: self.tree.focus_set())
+
+    def set_data(self, df):
+        """
+        Show `df` (the columns given at construction), keeping the current sort column.
+        """
+        self._frame = df.reset_index(drop=True)
+        self._order = list(range(len(self._frame)))
+        self._first = 0
+        visible = min(self.height, len(self._frame))
+        items = self.tree.get_children()
+        if len(items) > visible:
+            self.tree.delete(*items[visible:])
+        for _ in range(visible - len(items)):
+            self.tree.insert('', 'end', values=())
+        if self._sort_key is not None:
+            self._apply_sort()
+        self._render()
+
+    def sort(self, key):
+        # A second click on the same heading reverses the order
+        self._ascending = not self._ascending if key == self._sort_key else True
+        self._sort_key = key
+        self._apply_sort()
+        self._first = 0
+        self._render()
+
+    def _apply_sort(self):
+        ordered = self._frame[self._sort_key].sort_values(ascending=self._ascending, kind='mergesort', na_position='last')
+        self._order = ordered.index.tolist()
+        for column in self.columns:
+            arrow = (' ▲' if self._ascending else ' ▼') if column.key == self._sort_key else ''
+            self.tree.heading(column.key, text=column.heading + arrow)
+
+    def scroll_to(self, first):
+        self._first = max(0, min(first, len(self._order) - len(self.tree.get_children())))
+        self._render()
+        return 'break'
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(round(float(amount) * len(self._order)))
+        else:
+            step = self.height if unit == 'pages' else 1
+            self.scroll_to(self._first + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            return self.scroll_to(self._first - WHEEL_ROWS)
+        return self.scroll_to(self._first + WHEEL_ROWS)
+
+    def _render(self):
+        if self._frame is None:
+            return
+        items = self.tree.get_children()
+        rows = self._frame.iloc[self._order[self._first:self._first + len(items)]]
+        keys = [column.key for column in self.columns]
+        for item, row in zip(items, rows[keys].itertuples(index=False, name=None)):
+            values = ['' if _is_missing(value) else column.format(value) for column, value in zip(self.columns, row)]
+            self.tree.item(item, values=values)
+
+        total = len(self._order)
+        if total > len(items):
+            self.scrollbar.set(self._first / total, (self._first + len(items)) / total)
+        else:
+            self.scrollbar.set(0, 1)
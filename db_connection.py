@@ -1,135 +1,391 @@
-import mysql.connector
 import pandas as pd
 import os
-import subprocess
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL
+from tracing import span
+
+# Connection settings; override through the environment instead of editing this file
+DB_CONFIG = {
+    'host': os.environ.get('HOTEL_DB_HOST', 'localhost'),
+    'user': os.environ.get('HOTEL_DB_USER', 'root'),
+    'password': os.environ.get('HOTEL_DB_PASSWORD', 'ArxesGlwsswn1!'),
+    'database': os.environ.get('HOTEL_DB_NAME', 'hotel_booking'),
+}
+DB_POOL_SIZE = int(os.environ.get('HOTEL_DB_POOL_SIZE', 5))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get('HOTEL_DB_POOL_MAX_OVERFLOW', 5))
+DB_POOL_RECYCLE = int(os.environ.get('HOTEL_DB_POOL_RECYCLE', 3600))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Return the process-wide SQLAlchemy engine. Its QueuePool is shared by every database call in the GUI.
+
+    Connections are pinged on checkout (pool_pre_ping), so a connection dropped by the server is replaced
+    transparently instead of failing the next query.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            print("Connecting to MySQL database...")
+            url = URL.create(
+                'mysql+mysqlconnector',
+                username=DB_CONFIG['user'],
+                password=DB_CONFIG['password'],
+                host=DB_CONFIG['host'],
+                database=DB_CONFIG['database']
+            )
+            _engine = create_engine(
+                url,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_POOL_MAX_OVERFLOW,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=True
+            )
+        return _engine
+
+_connection_factory = None
+
+def use_connection_factory(factory):
+    '''
+    Route every connect_to_db() call to `factory()` instead of the MySQL pool, e.g. the local stand-in database
+    used by benchmark.py. Pass None to go back to MySQL.
+    '''
+    global _connection_factory
+    _connection_factory = factory
 
 def connect_to_db():
-    print("Connecting to MySQL database...")
-    connection = mysql.connector.connect(
-        host="localhost",  
-        user="root",       
-        password="ArxesGlwsswn1!",  
-        database="hotel_booking"
+    if _connection_factory is not None:
+        return _connection_factory()
+    # A pooled DB-API connection; close() hands it back to the pool instead of closing the socket
+    return get_engine().raw_connection()
+
+def check_db_health():
+    try:
+        with get_engine().connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+    except Exception as error:
+        print(f"Database health check failed: {error}")
+        return False
+
+def pool_status():
+    return get_engine().pool.status()
+
+def dispose_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+BOOKING_COLUMNS = [
+    'hotel', 'is_canceled', 'lead_time', 'arrival_date_year', 'arrival_date_month',
+    'arrival_date_week_number', 'arrival_date_day_of_month', 'stays_in_weekend_nights',
+    'stays_in_week_nights', 'adults', 'children', 'babies', 'meal', 'country',
+    'market_segment', 'distribution_channel', 'is_repeated_guest',
+    'previous_cancellations', 'previous_bookings_not_canceled', 'reserved_room_type',
+    'assigned_room_type', 'booking_changes', 'deposit_type', 'agent', 'company',
+    'days_in_waiting_list', 'customer_type', 'adr', 'required_car_parking_spaces',
+    'total_of_special_requests', 'reservation_status', 'reservation_status_date',
+    'name', 'email', 'phone_number', 'credit_card'
+]
+
+INSERT_BOOKING_SQL = f"""
+INSERT INTO bookings ({', '.join(BOOKING_COLUMNS)})
+VALUES ({', '.join(['%s'] * len(BOOKING_COLUMNS))})
+"""
+
+# Columns the GUI analyses actually read; everything else (including personal data) stays in MySQL
+ANALYSIS_COLUMNS = [
+    'hotel', 'is_canceled', 'arrival_date', 'arrival_date_year', 'arrival_date_month', 'arrival_date_day_of_month',
+    'stays_in_weekend_nights', 'stays_in_week_nights', 'adults', 'children', 'babies', 'reserved_room_type',
+    'customer_type'
+]
+
+MONTH_ORDER = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+
+CATEGORICAL_COLUMNS = [
+    'hotel', 'arrival_date_month', 'reserved_room_type', 'assigned_room_type', 'customer_type', 'meal',
+    'country', 'market_segment', 'distribution_channel', 'deposit_type', 'reservation_status'
+]
+
+# Night counts are summed together, so they get int16 headroom rather than int8
+INTEGER_DTYPES = {
+    'is_canceled': 'int8', 'is_repeated_guest': 'int8', 'arrival_date_year': 'int16',
+    'arrival_date_week_number': 'int8', 'arrival_date_day_of_month': 'int8',
+    'stays_in_weekend_nights': 'int16', 'stays_in_week_nights': 'int16', 'adults': 'int16', 'babies': 'int16',
+    'lead_time': 'int16', 'booking_changes': 'int16', 'required_car_parking_spaces': 'int8',
+    'total_of_special_requests': 'int8'
+}
+
+FLOAT_COLUMNS = ['children', 'adr']
+
+# Summary tables written by the GUI pages, keyed on hotel. Created once instead of being rebuilt on every write.
+SUMMARY_TABLES = {
+    'basic_statistics': """
+    CREATE TABLE IF NOT EXISTS basic_statistics (
+        hotel VARCHAR(255) NOT NULL,
+        average_nights DOUBLE,
+        cancellation_rate DOUBLE,
+        first_arrival DATETIME,
+        last_arrival DATETIME,
+        total_cancellations BIGINT,
+        total_bookings BIGINT,
+        cancellation_percentage DOUBLE,
+        PRIMARY KEY (hotel)
     )
-    print("Connected to MySQL database!")
-    return connection
+    """,
+    'booking_distribution': """
+    CREATE TABLE IF NOT EXISTS booking_distribution (
+        hotel VARCHAR(255) NOT NULL,
+        max_month TEXT,
+        min_month TEXT,
+        max_season TEXT,
+        min_season TEXT,
+        max_room_type TEXT,
+        min_room_type TEXT,
+        max_client_type TEXT,
+        min_client_type TEXT,
+        PRIMARY KEY (hotel)
+    )
+    """,
+}
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 10000
+
 
 def convert_nan_to_none(df):
-    return df.applymap(lambda x: None if pd.isna(x) else x)
+    # astype(object) also turns numpy scalars into plain Python values, which mysql.connector expects
+    return df.astype(object).where(df.notna(), None)
 
-def insert_booking_data(df):
-    df = convert_nan_to_none(df)
-    connection = connect_to_db()
-    cursor = connection.cursor()
+def _booking_rows(df):
+    # Missing optional columns (e.g. phone_number) are sent as NULL
+    df = convert_nan_to_none(df.reindex(columns=BOOKING_COLUMNS))
+    return list(df.itertuples(index=False, name=None))
 
-    for index, row in df.iterrows():
-        sql = """
-        INSERT INTO bookings (
-            hotel, is_canceled, lead_time, arrival_date_year, arrival_date_month,
-            arrival_date_week_number, arrival_date_day_of_month, stays_in_weekend_nights,
-            stays_in_week_nights, adults, children, babies, meal, country,
-            market_segment, distribution_channel, is_repeated_guest,
-            previous_cancellations, previous_bookings_not_canceled, reserved_room_type,
-            assigned_room_type, booking_changes, deposit_type, agent, company,
-            days_in_waiting_list, customer_type, adr, required_car_parking_spaces,
-            total_of_special_requests, reservation_status, reservation_status_date,
-            name, email, phone_number, credit_card
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        values = (
-            row['hotel'], row['is_canceled'], row['lead_time'], row['arrival_date_year'], row['arrival_date_month'],
-            row['arrival_date_week_number'], row['arrival_date_day_of_month'], row['stays_in_weekend_nights'],
-            row['stays_in_week_nights'], row['adults'], 
-            None if pd.isna(row['children']) else row['children'], 
-            row['babies'], row['meal'], row['country'],
-            row['market_segment'], row['distribution_channel'], row['is_repeated_guest'],
-            row['previous_cancellations'], row['previous_bookings_not_canceled'], row['reserved_room_type'],
-            row['assigned_room_type'], row['booking_changes'], row['deposit_type'], 
-            None if pd.isna(row['agent']) else row['agent'], 
-            None if pd.isna(row['company']) else row['company'], 
-            row['days_in_waiting_list'], row['customer_type'], row['adr'], row['required_car_parking_spaces'],
-            row['total_of_special_requests'], row['reservation_status'], row['reservation_status_date'],
-            row['name'], row['email'], row.get('phone_number', None), row['credit_card']
-        )
+def _insert_rows(cursor, rows, batch_size, verbose=False, first_index=0):
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if verbose:
+            for offset, values in enumerate(batch):
+                print(f"Row index: {first_index + start + offset}")
+                print(f"Values: {values}")
+        # mysql.connector rewrites executemany on INSERT into a single multi-row statement
+        cursor.executemany(INSERT_BOOKING_SQL, batch)
 
-        # Debug
-        print(f"Row index: {index}")
-        print(f"SQL query: {sql}")
-        print(f"Values: {values}")
-        print(f"Number of placeholders in SQL: {sql.count('%s')}")
-        print(f"Number of values provided: {len(values)}")
+def _update_cube(connection):
+    # Keep a built rollup cube current with the rows just inserted. cube.py is built on this module, so it is
+    # imported here rather than at the top.
+    from cube import update_cube
+    update_cube(connection)
 
-        cursor.execute(sql, values)
+def _print_progress(inserted, started, total=None):
+    elapsed = time.perf_counter() - started
+    rate = inserted / elapsed if elapsed > 0 else 0.0
+    progress = f"{inserted}/{total}" if total else f"{inserted}"
+    print(f"Inserted {progress} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+def insert_booking_data(df, batch_size=DEFAULT_BATCH_SIZE, verbose=False):
+    """
+    Insert a DataFrame of bookings using batched multi-row INSERT statements.
+
+    Parameters:
+    - df (DataFrame): Bookings with the columns of the `bookings` table.
+    - batch_size (int): Number of rows sent per INSERT statement.
+    - verbose (bool): Print every row's values before it is sent.
+    """
+    if verbose:
+        print(f"SQL query: {INSERT_BOOKING_SQL}")
+
+    with span('insert_booking_data') as current:
+        connection = connect_to_db()
+        cursor = connection.cursor()
+        started = time.perf_counter()
+
+        rows = _booking_rows(df)
+        _insert_rows(cursor, rows, batch_size, verbose)
+        _update_cube(connection)
+        connection.commit()
+        _print_progress(len(rows), started, len(rows))
+        current.record(rows=len(rows))
+
+        cursor.close()
+        connection.close()
+
+def bulk_insert_csv(csv_path, chunk_size=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE, verbose=False):
+    """
+    Stream a bookings CSV into the database chunk by chunk.
+
+    Each chunk is sent as batched multi-row INSERTs and committed on its own, together with its contribution to the
+    rollup cube (cube.py) when one has been built, so memory stays bounded by `chunk_size` and progress/throughput
+    is reported after every chunk.
+
+    Parameters:
+    - csv_path (str): Path to the bookings CSV file.
+    - chunk_size (int): Number of CSV rows read and committed at a time.
+    - batch_size (int): Number of rows sent per INSERT statement.
+    - verbose (bool): Print every row's values before it is sent.
+    """
+    if verbose:
+        print(f"SQL query: {INSERT_BOOKING_SQL}")
+
+    connection = connect_to_db()
+    cursor = connection.cursor()
+    started = time.perf_counter()
+    inserted = 0
+
+    for chunk in pd.read_csv(csv_path, sep=',', chunksize=chunk_size):
+        with span('bulk_insert_chunk') as current:
+            rows = _booking_rows(chunk)
+            _insert_rows(cursor, rows, batch_size, verbose, first_index=inserted)
+            _update_cube(connection)
+            connection.commit()
+            current.record(rows=len(rows))
+        inserted += len(rows)
+        _print_progress(inserted, started)
 
-    connection.commit()
     cursor.close()
     connection.close()
+    return inserted
 
-def retrieve_booking_data():
-    connection = connect_to_db()
-    query = """
-    SELECT 
-        hotel, is_canceled, lead_time, arrival_date_year, arrival_date_month,
-        arrival_date_week_number, arrival_date_day_of_month, stays_in_weekend_nights,
-        stays_in_week_nights, adults, children, babies, meal, country,
-        market_segment, distribution_channel, is_repeated_guest,
-        previous_cancellations, previous_bookings_not_canceled, reserved_room_type,
-        assigned_room_type, booking_changes, deposit_type, agent, company,
-        days_in_waiting_list, customer_type, adr, required_car_parking_spaces,
-        total_of_special_requests, reservation_status, reservation_status_date,
-        name, email, phone_number, credit_card
-    FROM bookings
+def optimize_booking_dtypes(df):
     """
-    
-    df = pd.read_sql(query, connection)
-    connection.close()
-    
+    Return a compact copy of a bookings DataFrame: repeated labels become categoricals and the small integer
+    columns are downcast. Integer columns that contain NULLs are left as floats.
+    """
+    df = df.copy(deep=False)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            if column == 'arrival_date_month':
+                df[column] = pd.Categorical(df[column], categories=MONTH_ORDER, ordered=True)
+            else:
+                df[column] = df[column].astype('category')
+    for column, dtype in INTEGER_DTYPES.items():
+        if column in df.columns and not df[column].isna().any():
+            df[column] = df[column].astype(dtype)
+    for column in FLOAT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('float32')
     return df
 
+def retrieve_booking_data(columns=ANALYSIS_COLUMNS, connection=None, date_min=None, date_max=None, after_id=None, max_id=None):
+    """
+    Read the requested bookings columns with compact dtypes.
 
-def save_tables_to_csv(table_names, connection_params):
+    Parameters:
+    - columns (list of str): Columns to select. Defaults to the columns the GUI analyses use, which keeps
+      personal data (name, email, phone_number, credit_card) out of memory. Pass BOOKING_COLUMNS for all.
+    - connection: Open connection to reuse. A new one is opened and closed when omitted.
+    - date_min, date_max: Optional arrival date range. When both are given the filter runs in MySQL on the
+      indexed `arrival_date` column, so only matching rows are transferred.
+    - after_id, max_id: Optional id watermarks; only rows with after_id < id <= max_id are read.
+
+    Rows always come back in booking (id) order, whichever index MySQL uses, so summaries that break ties by first
+    appearance (views.booking_distribution_summary) agree across read paths and with the rollup cube.
     """
-    Save specified tables from a MySQL database to CSV files.
+    own_connection = connection is None
+    if own_connection:
+        connection = connect_to_db()
+    conditions, params = [], []
+    if date_min is not None and date_max is not None:
+        conditions.append("arrival_date BETWEEN %s AND %s")
+        params += [pd.Timestamp(date_min).date(), pd.Timestamp(date_max).date()]
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+    if max_id is not None:
+        conditions.append("id <= %s")
+        params.append(max_id)
+    query = f"SELECT {', '.join(columns)} FROM bookings"
+    if conditions:
+        query += f" WHERE {' AND '.join(conditions)}"
+    query += " ORDER BY id"
+
+    parse_dates = ['arrival_date'] if 'arrival_date' in columns else None
+    with span('read_sql', columns=len(columns), ranged=date_min is not None and date_max is not None, delta=after_id is not None) as current:
+        df = pd.read_sql(query, connection, params=tuple(params) or None, parse_dates=parse_dates)
+        current.record(df)
+    if own_connection:
+        connection.close()
+
+    with span('optimize_booking_dtypes'):
+        return optimize_booking_dtypes(df)
+
+_summary_lock = threading.Lock()
+_summary_tables_created = set()
+_summary_rows_written = {}
+
+def upsert_summary_table(df, table_name):
+    """
+    Write a per-hotel summary DataFrame into one of the SUMMARY_TABLES.
+
+    The table is created once per process, rows are upserted with INSERT ... ON DUPLICATE KEY UPDATE and hotels
+    missing from `df` are deleted, so the table ends up matching `df` without any DDL on the hot path. Nothing is
+    sent when the rows equal the ones this process wrote last time.
+
+    Returns True when the table was written, False when the write was skipped.
+    """
+    columns = list(df.columns)
+    rows = list(convert_nan_to_none(df).itertuples(index=False, name=None))
+
+    with _summary_lock, span('upsert_summary_table', table=table_name) as current:
+        current.record(rows=len(rows))
+        if _summary_rows_written.get(table_name) == rows:
+            current.record(skipped=True)
+            return False
+
+        connection = connect_to_db()
+        cursor = connection.cursor()
+        if table_name not in _summary_tables_created:
+            cursor.execute(SUMMARY_TABLES[table_name])
+            _summary_tables_created.add(table_name)
+
+        upsert_sql = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(f'{column} = VALUES({column})' for column in columns if column != 'hotel')}"
+        )
+        cursor.executemany(upsert_sql, rows)
+        hotels = [row[columns.index('hotel')] for row in rows]
+        if hotels:
+            cursor.execute(f"DELETE FROM {table_name} WHERE hotel NOT IN ({', '.join(['%s'] * len(hotels))})", hotels)
+        else:
+            cursor.execute(f"DELETE FROM {table_name}")
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+        _summary_rows_written[table_name] = rows
+        return True
+
+
+def save_tables_to_csv(table_names):
+    """
+    Save specified tables from a MySQL database to CSV files in 'tables', streamed in chunks (see export.py).
 
     Parameters:
     - table_names (list of str): List of table names to be saved.
-    - connection_params (dict): Dictionary with connection parameters.
     """
-    os.makedirs('tables', exist_ok=True)
-    
-    connection = mysql.connector.connect(**connection_params)
-    
-    for table in table_names:
-        
-        query = f"SELECT * FROM {table}"
-        df = pd.read_sql(query, connection)
-        csv_path = os.path.join('tables', f"{table}.csv")
-        
-        df.to_csv(csv_path, index=False)
-        
-    connection.close()
-
-def export_db_schema(connection_params):
-    os.makedirs('tables', exist_ok=True)
+    from export import export_tables
+    return export_tables(table_names, 'tables', 'csv')
 
-    dump_command = (
-        f"mysqldump --user={connection_params['user']} "
-        f"--password={connection_params['password']} "
-        f"--host={connection_params['host']} "
-        f"--no-data {connection_params['database']} > tables/schema.sql"
-    )
-    subprocess.run(dump_command, shell=True, check=True)
-    print("Database schema has been exported to 'tables/schema.sql'")
+def export_db_schema(path=os.path.join('tables', 'schema.sql')):
+    # DDL read over the pooled connection (SHOW CREATE TABLE), no mysqldump subprocess
+    from export import export_schema
+    export_schema(path)
+    print(f"Database schema has been exported to '{path}'")
 
 
 if __name__ == "__main__":
-    connection_params = {
-        'host': 'localhost',  
-        'user': 'root',       
-        'password': 'ArxesGlwsswn1!', 
-        'database': 'hotel_booking'  
-    }
-
     table_names = ['basic_statistics', 'booking_distribution']  
-    save_tables_to_csv(table_names, connection_params)
-    export_db_schema(connection_params)
+    save_tables_to_csv(table_names)
+    export_db_schema()
@@ -0,0 +1,99 @@
+import os
+import numpy as np
+
+'''
+Downsampling of plotted series to the resolution of the axis.
+
+A daily trend over several years has thousands of points per line, far more than the few hundred pixels of its axis,
+and matplotlib pays for every one of them. Before a series is plotted it is reduced to about one point per pixel
+column (at least MIN_POINTS points are always kept):
+
+- 'minmax': the axis is cut into buckets of two pixels and the lowest and highest point of every bucket are kept,
+  in their original order. The drawn line keeps every peak and dip at screen resolution.
+- 'lttb':   Largest-Triangle-Three-Buckets keeps one point per pixel, the one that forms the largest triangle with
+  the points kept for its neighbouring buckets; fewer points, the shape is still preserved.
+- 'off':    plot every point, for exact output.
+
+The method is set with HOTEL_PLOT_DOWNSAMPLE ('minmax' by default). The first and last points are always kept, and
+series with missing or infinite values are plotted as they are.
+'''
+
+DOWNSAMPLE = os.environ.get('HOTEL_PLOT_DOWNSAMPLE', 'minmax')
+DOWNSAMPLE_METHODS = ['minmax', 'lttb', 'off']
+MIN_POINTS = 16
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype('int64').astype('float64')
+    return values.astype('float64')
+
+def minmax_indices(y, points):
+    # Lowest and highest point of points // 2 equal-count buckets, plus both ends
+    n = len(y)
+    buckets = max(1, points // 2)
+    edges = np.linspace(1, n - 1, buckets + 1).astype('int64')
+    keep = [0]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            bucket = y[start:stop]
+            keep.extend(sorted({start + int(np.argmin(bucket)), start + int(np.argmax(bucket))}))
+    keep.append(n - 1)
+    return np.unique(keep)
+
+def lttb_indices(x, y, points):
+    # Largest-Triangle-Three-Buckets (Steinarsson, 2013)
+    n = len(y)
+    edges = np.linspace(1, n - 1, points - 1).astype('int64')
+    keep = [0]
+    previous = 0
+    for i in range(len(edges) - 1):
+        start, stop = edges[i], edges[i + 1]
+        if stop <= start:
+            continue
+        # The third vertex is the average of the next bucket (or the last point)
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        keep.append(previous)
+    keep.append(n - 1)
+    return np.unique(keep)
+
+def downsample_indices(x, y, pixels, method=None):
+    """
+    Return the positions of the points of (x, y) to plot on an axis `pixels` wide.
+
+    Parameters:
+    - x: Sorted x values (numbers or datetimes).
+    - y: y values.
+    - pixels (int): Width of the axis in pixels.
+    - method (str): One of DOWNSAMPLE_METHODS; DOWNSAMPLE when omitted.
+    """
+    method = method or DOWNSAMPLE
+    n = len(y)
+    points = max(int(pixels), MIN_POINTS)
+    if method == 'off' or n <= points:
+        return np.arange(n)
+    y = _as_float(y)
+    if not np.isfinite(y).all():
+        return np.arange(n)
+    if method == 'minmax':
+        return minmax_indices(y, points)
+    if method == 'lttb':
+        return lttb_indices(_as_float(x), y, points)
+    raise ValueError(f"Unknown downsampling method {method!r}, expected one of {', '.join(DOWNSAMPLE_METHODS)}")
+
+def downsample_series(ax, x, y, method=None):
+    """
+    (x, y) reduced to the pixel width of `ax` (pandas Series or arrays, returned as the same type).
+    """
+    keep = downsample_indices(x, y, ax.get_window_extent().width, method)
+    if len(keep) == len(y):
+        return x, y
+    take = lambda values: values.iloc[keep] if hasattr(values, 'iloc') else np.asarray(values)[keep]
+    return take(x), take(y)
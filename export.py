@@ -0,0 +1,279 @@
+import argparse
+import csv
+import datetime
+import gzip
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+from db_connection import DB_CONFIG, connect_to_db
+from tracing import span
+
+'''
+Streaming export of MySQL tables and of the database schema.
+
+Every table is read through an unbuffered (server-side streamed) cursor in chunks of `chunk_size` rows, and every
+chunk is written out before the next one is fetched, so peak memory depends on the chunk size and not on the table
+size; a `bookings` table of tens of millions of rows exports like a summary table, only for longer. Formats:
+
+- csv, csv.gz: plain or gzip-compressed CSV with a header row; needs only the standard library.
+- parquet:     one row group per chunk; needs pyarrow.
+- arrow:       Arrow IPC file (Feather v2), memory-mappable like the local snapshot; needs pyarrow.
+
+The Arrow/Parquet column types come from information_schema, not from the data, so every chunk has the same
+schema. export_tables() runs several tables at once, each on its own pooled connection. Files are written next to
+their target and swapped in when complete.
+
+export_schema() writes the CREATE TABLE statement of every table (SHOW CREATE TABLE) over the existing connection,
+so there is no mysqldump subprocess and the password never appears on a command line.
+
+    python export.py --tables bookings basic_statistics --format parquet --output exports --schema
+'''
+
+EXPORT_FORMATS = ['csv', 'csv.gz', 'parquet', 'arrow']
+DEFAULT_EXPORT_CHUNK_SIZE = 50000
+DEFAULT_EXPORT_WORKERS = 4
+
+
+def _quote(name):
+    return f"`{name.replace('`', '``')}`"
+
+def list_tables(connection):
+    cursor = connection.cursor()
+    cursor.execute("SHOW FULL TABLES WHERE Table_type = 'BASE TABLE'")
+    tables = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return tables
+
+
+def _to_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode('utf-8', errors='replace')
+    if isinstance(value, (set, frozenset)):
+        # SET columns
+        return ','.join(sorted(value))
+    return str(value)
+
+def _arrow_type(data_type, column_type, precision, scale):
+    # MySQL column (information_schema.COLUMNS) -> Arrow type, or None for columns exported as text
+    unsigned = 'unsigned' in column_type
+    integers = {'tinyint': 8, 'smallint': 16, 'mediumint': 32, 'int': 32, 'integer': 32, 'bigint': 64}
+    if data_type in integers:
+        bits = integers[data_type]
+        if unsigned:
+            return {8: pa.uint8(), 16: pa.uint16(), 32: pa.uint32(), 64: pa.uint64()}[bits]
+        return {8: pa.int8(), 16: pa.int16(), 32: pa.int32(), 64: pa.int64()}[bits]
+    if data_type in ('year', 'bit'):
+        return pa.int64()
+    if data_type == 'float':
+        return pa.float32()
+    if data_type in ('double', 'real'):
+        return pa.float64()
+    if data_type == 'decimal':
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    if data_type == 'date':
+        return pa.date32()
+    if data_type in ('datetime', 'timestamp'):
+        return pa.timestamp('us')
+    if data_type == 'time':
+        # mysql.connector returns TIME values as timedelta
+        return pa.duration('us')
+    if data_type in ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob'):
+        return pa.binary()
+    return None
+
+def arrow_schema(connection, table):
+    """
+    Return the Arrow schema of `table`, read from information_schema.
+    """
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, NUMERIC_PRECISION, NUMERIC_SCALE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+        (table,)
+    )
+    fields = []
+    for name, data_type, column_type, precision, scale in cursor.fetchall():
+        data_type, column_type = _to_text(data_type).lower(), _to_text(column_type).lower()
+        fields.append(pa.field(name, _arrow_type(data_type, column_type, precision, scale) or pa.string()))
+    cursor.close()
+    if not fields:
+        raise ValueError(f"Table {table} does not exist in database {DB_CONFIG['database']}")
+    return pa.schema(fields)
+
+
+class CsvWriter:
+    def __init__(self, path, columns, compress=False):
+        self.file = gzip.open(path, 'wt', encoding='utf-8', newline='') if compress else open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowWriter:
+    def __init__(self, path, schema, parquet=False):
+        self.schema = schema
+        self.text_columns = [i for i, field in enumerate(schema) if pa.types.is_string(field.type)]
+        if parquet:
+            self.sink = None
+            self.writer = pq.ParquetWriter(path, schema)
+        else:
+            self.sink = pa.OSFile(path, 'wb')
+            self.writer = pa.ipc.new_file(self.sink, schema)
+
+    def write(self, rows):
+        columns = [list(column) for column in zip(*rows)]
+        for i in self.text_columns:
+            columns[i] = [_to_text(value) for value in columns[i]]
+        arrays = [pa.array(column, type=field.type) for column, field in zip(columns, self.schema)]
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+
+
+def _open_writer(path, fmt, columns, schema):
+    if fmt in ('csv', 'csv.gz'):
+        return CsvWriter(path, columns, compress=fmt == 'csv.gz')
+    return ArrowWriter(path, schema, parquet=fmt == 'parquet')
+
+def export_table(table, directory='tables', fmt='csv.gz', chunk_size=DEFAULT_EXPORT_CHUNK_SIZE, connection=None):
+    """
+    Stream one table to `directory`/<table>.<fmt> and return the path of the file.
+
+    Parameters:
+    - table (str): Table to export.
+    - directory (str): Output directory, created when missing.
+    - fmt (str): One of EXPORT_FORMATS.
+    - chunk_size (int): Rows fetched and written at a time; bounds the memory used.
+    - connection: Optional open DB-API connection; a pooled one is used (and returned) otherwise.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+    if fmt in ('parquet', 'arrow') and pa is None:
+        raise RuntimeError(f"Exporting to {fmt} needs pyarrow")
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{table}.{fmt}")
+    temporary_path = f"{path}.tmp"
+    own_connection = connection is None
+    if own_connection:
+        connection = connect_to_db()
+    try:
+        with span('export_table', table=table, format=fmt) as current:
+            schema = arrow_schema(connection, table) if fmt in ('parquet', 'arrow') else None
+            # Pooled connections hand out buffered cursors (SQLAlchemy's mysqlconnector dialect sets buffered=True),
+            # which would read the whole table before the first fetch; stream the rows off the socket instead
+            cursor = connection.cursor(buffered=False)
+            cursor.execute(f"SELECT * FROM {_quote(table)}")
+            columns = [description[0] for description in cursor.description]
+            writer = None
+            rows_written = 0
+            exhausted = False
+            try:
+                writer = _open_writer(temporary_path, fmt, columns, schema)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        exhausted = True
+                        break
+                    writer.write(rows)
+                    rows_written += len(rows)
+            finally:
+                if writer is not None:
+                    writer.close()
+                if not exhausted:
+                    # An unbuffered cursor cannot be closed with rows left unread
+                    connection.consume_results()
+                cursor.close()
+            os.replace(temporary_path, path)
+            current.record(rows=rows_written, bytes=os.path.getsize(path))
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        if own_connection:
+            connection.close()
+    return path
+
+def export_tables(tables, directory='tables', fmt='csv.gz', chunk_size=DEFAULT_EXPORT_CHUNK_SIZE,
+                  max_workers=DEFAULT_EXPORT_WORKERS):
+    """
+    Export several tables concurrently, each on its own pooled connection. Returns {table: path}.
+
+    Parameters:
+    - tables (list of str): Tables to export.
+    - directory, fmt, chunk_size: As for export_table().
+    - max_workers (int): Tables exported at the same time.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tables))), thread_name_prefix='export') as executor:
+        futures = {table: executor.submit(export_table, table, directory, fmt, chunk_size) for table in tables}
+        return {table: future.result() for table, future in futures.items()}
+
+def export_schema(path=os.path.join('tables', 'schema.sql'), tables=None, connection=None):
+    """
+    Write the CREATE TABLE statements of the database (or of `tables`) to `path` and return the path.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = connect_to_db()
+    try:
+        with span('export_schema') as current:
+            tables = tables or list_tables(connection)
+            statements = []
+            cursor = connection.cursor()
+            for table in tables:
+                cursor.execute(f"SHOW CREATE TABLE {_quote(table)}")
+                ddl = _to_text(cursor.fetchone()[1])
+                statements.append(f"--\n-- Table structure for table {_quote(table)}\n--\n\n"
+                                  f"DROP TABLE IF EXISTS {_quote(table)};\n{ddl};\n")
+            cursor.close()
+            current.record(rows=len(tables))
+    finally:
+        if own_connection:
+            connection.close()
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    header = (f"-- Schema of database {DB_CONFIG['database']} on {DB_CONFIG['host']}\n"
+              f"-- Exported by export.py on {datetime.datetime.now().isoformat(timespec='seconds')}\n\n")
+    with open(path, 'w', encoding='utf-8') as schema_file:
+        schema_file.write(header + '\n'.join(statements))
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream MySQL tables to CSV, CSV.gz, Parquet or Arrow files.")
+    parser.add_argument('--tables', nargs='+', help="Tables to export (default: every table)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv.gz', help="Output format")
+    parser.add_argument('--output', default='tables', help="Output directory")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_EXPORT_CHUNK_SIZE, help="Rows fetched at a time")
+    parser.add_argument('--workers', type=int, default=DEFAULT_EXPORT_WORKERS, help="Tables exported concurrently")
+    parser.add_argument('--schema', action='store_true', help="Also write <output>/schema.sql")
+    args = parser.parse_args()
+
+    tables = args.tables
+    if not tables:
+        connection = connect_to_db()
+        tables = list_tables(connection)
+        connection.close()
+
+    started = time.perf_counter()
+    for table, path in export_tables(tables, args.output, args.format, args.chunk_size, args.workers).items():
+        print(f"{table}: {path} ({os.path.getsize(path) / 2**20:.1f} MiB)")
+    if args.schema:
+        print(f"Schema: {export_schema(os.path.join(args.output, 'schema.sql'), tables)}")
+    print(f"Exported {len(tables)} tables in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+from db_connection import MONTH_ORDER
+from tracing import span
+
+'''
+Derived booking columns.
+
+The FEATURE_COLUMNS are computed by data_access once per data version, right after the base columns are read, and
+cached next to the base frame, so every page (and report.py) reads them like any other column instead of
+rebuilding them:
+
+- total_nights: weekend + week nights, int16 like its inputs.
+- season:       categorical with int8 codes, looked up from the arrival month's categorical codes.
+- party_type:   categorical with int8 codes (family, couple, single traveller, 'Other').
+
+No full-length string column is ever built. The arrival day and arrival week (Monday of the arrival day's week),
+used only by the finer grained trends, are 8-byte dates and are computed when an analysis asks for them instead.
+
+Each derived column is declared once in DERIVED_COLUMNS with its base columns, the pandas implementation and the
+equivalent SQL expression used by the analyses' 'sql' engine.
+'''
+
+SEASON_MAP = {
+    'January': 'Χειμώνας', 'February': 'Χειμώνας', 'March': 'Άνοιξη',
+    'April': 'Άνοιξη', 'May': 'Άνοιξη', 'June': 'Καλοκαίρι',
+    'July': 'Καλοκαίρι', 'August': 'Καλοκαίρι', 'September': 'Φθινόπωρο',
+    'October': 'Φθινόπωρο', 'November': 'Φθινόπωρο', 'December': 'Χειμώνας'
+}
+
+# Party composition; bookings matching none of the rules are 'Other'
+PARTY_TYPES = ['Οικογένεια', 'Ζευγάρι', 'Μεμονωμένοι Ταξιδιώτες']
+OTHER_PARTY = 'Other'
+
+# Categories in label order, so groupings come out in the same order as they did with plain string columns
+SEASONS = sorted(set(SEASON_MAP.values()))
+PARTY_CATEGORIES = sorted(PARTY_TYPES + [OTHER_PARTY])
+
+# Month code (position in MONTH_ORDER) -> season code
+_SEASON_CODES = np.array([SEASONS.index(SEASON_MAP[month]) for month in MONTH_ORDER], dtype='int8')
+
+
+def total_nights(df):
+    return df['stays_in_weekend_nights'] + df['stays_in_week_nights']
+
+def season(df):
+    months = pd.Categorical(df['arrival_date_month'], categories=MONTH_ORDER)
+    codes = np.where(months.codes >= 0, _SEASON_CODES[months.codes], -1).astype('int8')
+    return pd.Series(pd.Categorical.from_codes(codes, SEASONS), index=df.index)
+
+def arrival_day(df):
+    days = df['arrival_date_day_of_month'].astype('int64') - 1
+    return df['arrival_date'] + pd.to_timedelta(days, unit='D')
+
+def arrival_week(df):
+    day = arrival_day(df)
+    return day - pd.to_timedelta(day.dt.weekday, unit='D')
+
+def party_type(df):
+    kids = df['children'] + df['babies']
+    conditions = [
+        (df['adults'] > 1) & (kids > 0),
+        (df['adults'] > 1) & (kids == 0),
+        (df['adults'] == 1) & (kids == 0)
+    ]
+    choices = [PARTY_CATEGORIES.index(party) for party in PARTY_TYPES]
+    codes = np.select(conditions, choices, default=PARTY_CATEGORIES.index(OTHER_PARTY)).astype('int8')
+    return pd.Series(pd.Categorical.from_codes(codes, PARTY_CATEGORIES), index=df.index)
+
+# Derived columns: the base columns they are computed from, the pandas implementation and the SQL expression
+DERIVED_COLUMNS = {
+    'total_nights': (
+        ['stays_in_weekend_nights', 'stays_in_week_nights'],
+        total_nights,
+        "stays_in_weekend_nights + stays_in_week_nights"
+    ),
+    'season': (
+        ['arrival_date_month'],
+        season,
+        "CASE arrival_date_month "
+        + " ".join(f"WHEN '{month}' THEN '{name}'" for month, name in SEASON_MAP.items())
+        + " END"
+    ),
+    'party_type': (
+        ['adults', 'children', 'babies'],
+        party_type,
+        f"CASE WHEN adults > 1 AND children + babies > 0 THEN '{PARTY_TYPES[0]}' "
+        f"WHEN adults > 1 AND children + babies = 0 THEN '{PARTY_TYPES[1]}' "
+        f"WHEN adults = 1 AND children + babies = 0 THEN '{PARTY_TYPES[2]}' ELSE '{OTHER_PARTY}' END"
+    ),
+    'arrival_day': (
+        ['arrival_date', 'arrival_date_day_of_month'],
+        arrival_day,
+        "DATE_ADD(arrival_date, INTERVAL arrival_date_day_of_month - 1 DAY)"
+    ),
+    'arrival_week': (
+        ['arrival_date', 'arrival_date_day_of_month'],
+        arrival_week,
+        "DATE_SUB(DATE_ADD(arrival_date, INTERVAL arrival_date_day_of_month - 1 DAY), "
+        "INTERVAL WEEKDAY(DATE_ADD(arrival_date, INTERVAL arrival_date_day_of_month - 1 DAY)) DAY)"
+    ),
+}
+
+# Derived columns kept in the bookings cache; the others are computed per analysis
+FEATURE_COLUMNS = ['total_nights', 'season', 'party_type']
+
+# Derived columns holding dates
+DATE_COLUMNS = ['arrival_day', 'arrival_week']
+
+
+def base_columns(columns):
+    # The columns to read from the bookings table to serve `columns`, derived ones replaced by their inputs
+    needed = []
+    for column in columns:
+        for base in DERIVED_COLUMNS[column][0] if column in DERIVED_COLUMNS else [column]:
+            if base not in needed:
+                needed.append(base)
+    return needed
+
+def add_derived_columns(df, columns=FEATURE_COLUMNS):
+    # Adds the requested derived columns that `df` does not carry yet, in place
+    for column in columns:
+        if column in DERIVED_COLUMNS and column not in df.columns:
+            df[column] = DERIVED_COLUMNS[column][1](df)
+    return df
+
+def derive_features(df):
+    with span('derive_features') as current:
+        add_derived_columns(df, FEATURE_COLUMNS)
+        current.record(df[FEATURE_COLUMNS])
+    return df
@@ -0,0 +1,153 @@
+import base64
+import io
+import os
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from tracing import span
+
+'''
+Figure display helpers for the GUI pages.
+
+Figures are drawn straight into the Toplevel through an Agg canvas embedded in Tk, so showing a plot no longer
+costs a PNG encode, a disk write and a decode. Exporting the plot to media/graphics is a separate, optional step:
+the pixels already rendered on screen are copied and encoded to PNG on a background thread.
+
+Set HOTEL_EXPORT_PLOTS=0 to skip the PNG export entirely.
+
+The encoded PNG can also be handed to a callback (show_figure(on_png=...)), which is how rendered views reach the
+render cache (render_cache.py); show_png() puts such a cached PNG back on screen without drawing anything.
+
+Figures are created through `figure_manager` rather than pyplot, so no global pyplot state keeps them alive. Each
+figure is adopted by the window that shows it and is released when that window is destroyed: it is cleared,
+detached from its Tk canvas and kept as a spare for the next window (up to FigureManager.max_spare), so the
+number of live figures stays flat no matter how many windows are opened.
+'''
+
+EXPORT_PLOTS = os.environ.get('HOTEL_EXPORT_PLOTS', '1') != '0'
+
+# A single worker keeps writes to the same file ordered
+_export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='plot-export')
+
+
+class FigureManager:
+    def __init__(self, max_spare=4):
+        self.max_spare = max_spare
+        self._owned = {}
+        self._spare = []
+        self._lock = threading.Lock()
+
+    def new_figure(self, figsize, owner=None):
+        '''
+        Return an empty Figure of `figsize` inches, reusing a spare one if any.
+
+        Figures may be built on a worker thread; they are then handed to their window on the Tk thread with
+        adopt(). Passing `owner` adopts immediately and must only be done on the Tk thread.
+        '''
+        with self._lock:
+            fig = self._spare.pop() if self._spare else Figure()
+        fig.set_size_inches(figsize)
+        if owner is not None:
+            self.adopt(owner, fig)
+        return fig
+
+    def adopt(self, owner, fig):
+        # Tie `fig` to the Tk widget `owner`; it is released when the widget is destroyed
+        with self._lock:
+            first_for_owner = owner not in self._owned
+            self._owned.setdefault(owner, []).append(fig)
+        if first_for_owner:
+            owner.bind('<Destroy>', lambda event: self._on_destroy(event, owner), add='+')
+
+    def _on_destroy(self, event, owner):
+        # <Destroy> is also delivered for every child widget of a Toplevel
+        if event.widget is owner:
+            self.release(owner)
+
+    def release(self, owner):
+        with self._lock:
+            figures = self._owned.pop(owner, [])
+            for fig in figures:
+                fig.clear()
+                # Drop the reference to the (destroyed) Tk canvas so it can be collected
+                FigureCanvasBase(fig)
+                if len(self._spare) < self.max_spare:
+                    self._spare.append(fig)
+
+    def live_count(self):
+        with self._lock:
+            return sum(len(figures) for figures in self._owned.values())
+
+    def spare_count(self):
+        with self._lock:
+            return len(self._spare)
+
+
+figure_manager = FigureManager()
+
+
+def _write_file(png, filename):
+    # Skipped when the file already holds these bytes, e.g. a cached view shown again
+    try:
+        with open(filename, 'rb') as existing:
+            if existing.read() == png:
+                return
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'wb') as png_file:
+        png_file.write(png)
+
+def _encode_png(pixels, filename=None, on_png=None):
+    with span('png_export', file=os.path.basename(filename) if filename else None) as current:
+        buffer = io.BytesIO()
+        Image.fromarray(pixels, 'RGBA').save(buffer, format='PNG')
+        png = buffer.getvalue()
+        if filename:
+            _write_file(png, filename)
+        current.record(bytes=len(png))
+    if on_png is not None:
+        on_png(png)
+
+def export_canvas_async(canvas, filename=None, on_png=None):
+    # Copy the rendered buffer on the Tk thread; only the PNG encode and the write happen in the background
+    pixels = np.asarray(canvas.buffer_rgba()).copy()
+    return _export_executor.submit(_encode_png, pixels, filename, on_png)
+
+def show_figure(parent, fig, filename=None, on_png=None):
+    """
+    Render `fig` into a Tk widget owned by `parent` and return that widget for the caller to place.
+
+    Parameters:
+    - parent: Tk container the plot belongs to.
+    - fig (Figure): The figure to display.
+    - filename (str): Optional PNG path; written asynchronously when EXPORT_PLOTS is enabled.
+    - on_png (callable): Optional; called on the export thread with the rendered PNG bytes (e.g. render_cache.put).
+    """
+    canvas = FigureCanvasTkAgg(fig, master=parent)
+    with span('draw_figure'):
+        canvas.draw()
+    filename = filename if EXPORT_PLOTS else None
+    if filename or on_png is not None:
+        export_canvas_async(canvas, filename, on_png)
+    return canvas.get_tk_widget()
+
+def show_png(parent, png, filename=None):
+    """
+    Show an already rendered plot (PNG bytes, e.g. from the render cache) in a Tk widget owned by `parent` and return
+    that widget for the caller to place. Tk decodes the PNG itself; no figure is drawn.
+    """
+    with span('show_png') as current:
+        current.record(bytes=len(png))
+        photo = tk.PhotoImage(master=parent, data=base64.b64encode(png))
+        label = tk.Label(parent, image=photo, borderwidth=0)
+        # Tk images are freed with their last Python reference
+        label.image = photo
+    if filename and EXPORT_PLOTS:
+        _export_executor.submit(_write_file, png, filename)
+    return label
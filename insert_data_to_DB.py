@@ -1,10 +1,15 @@
-import pandas as pd
-from db_connection import insert_booking_data
+import argparse
+from db_connection import bulk_insert_csv, DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE
 
 def main():
-    data = pd.read_csv('hotel_booking.csv', sep=',')
-    df = pd.DataFrame(data)
-    insert_booking_data(df)
+    parser = argparse.ArgumentParser(description="Load hotel_booking.csv into the bookings table.")
+    parser.add_argument('--csv', default='hotel_booking.csv', help="Path to the bookings CSV file")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="CSV rows read and committed at a time")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows sent per multi-row INSERT")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Print every row before it is inserted")
+    args = parser.parse_args()
+
+    bulk_insert_csv(args.csv, chunk_size=args.chunk_size, batch_size=args.batch_size, verbose=args.verbose)
 
 if __name__ == "__main__":
     main()
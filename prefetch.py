@@ -0,0 +1,144 @@
+import io
+import os
+import sys
+import threading
+import time
+from tasks import pending_tasks
+from tracing import set_stage_check, span
+
+'''
+Idle-time prefetch of the main menu's views.
+
+With HOTEL_PREFETCH=data the prefetcher computes every page and option of the default scope ("Συνολικά Στοιχεία")
+in the background once the main menu is on screen: the bookings (or the rollup cube) are loaded and every aggregate
+lands in the analysis result cache (analyses.run_analysis), so the first click only has to draw. HOTEL_PREFETCH=render
+also renders each figure into the render cache (render_cache.py), so the first click shows a finished PNG.
+
+It never competes with the user:
+
+- it runs one view at a time on a thread of its own (never on the pages' tasks.TaskRunner pool), at the lowest CPU
+  priority on Linux (nice 19 for that thread);
+- before every view it waits until no page is loading (tasks.pending_tasks()) and there has been no key press, click
+  or mouse movement for HOTEL_PREFETCH_IDLE_MS (1500 ms by default);
+- within a view it checks before every stage (tracing.set_stage_check) whether a page has started loading, and if so
+  abandons the view, returning its pooled connection, and fetches it again once the GUI is idle;
+- it stops at the first error, e.g. when MySQL cannot be reached.
+
+The views are fetched in the order given, so the menu passes its current selections first.
+'''
+
+PREFETCH_MODE = os.environ.get('HOTEL_PREFETCH', 'off')
+IDLE_AFTER_MS = int(os.environ.get('HOTEL_PREFETCH_IDLE_MS', 1500))
+POLL_INTERVAL_MS = 200
+INPUT_EVENTS = ['<KeyPress>', '<ButtonPress>', '<Motion>', '<MouseWheel>']
+
+
+class PrefetchInterrupted(Exception):
+    pass
+
+
+def prefetch_view(page, option, render=False):
+    """
+    Compute one view of the default scope so that opening it later hits the caches.
+
+    Parameters:
+    - page (str): Key of views.VIEWS.
+    - option (str): The page option (None for pages without options).
+    - render (bool): Also render the figure into the render cache.
+    """
+    # Imported here, on the prefetch thread, so the menu never waits for them
+    if render:
+        from render_cache import cached_view, render_cache
+        data, fig, png, plot_file, key = cached_view(page, option)
+        if fig is not None and key is not None:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png')
+            render_cache.put(key, buffer.getvalue(), data)
+    else:
+        from data_access import pinned_data_version
+        from views import VIEWS
+        data_step = VIEWS[page][0]
+        with pinned_data_version():
+            data_step(option)
+
+
+class Prefetcher:
+    def __init__(self, root, views, render=False, idle_after_ms=IDLE_AFTER_MS):
+        self.root = root
+        self.views = list(views)
+        self.render = render
+        self.idle_after = idle_after_ms / 1000
+        self.fetched = []
+        self._last_input = time.monotonic()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # Called once the menu is built; user input from any window postpones the next view
+        for sequence in INPUT_EVENTS:
+            self.root.bind_all(sequence, self._on_input, add='+')
+        self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _on_input(self, event):
+        self._last_input = time.monotonic()
+
+    def _check(self):
+        # Stage boundary inside a view: give way as soon as a page starts loading or the menu closes
+        if self._stopped.is_set() or pending_tasks():
+            raise PrefetchInterrupted()
+
+    def _idle(self):
+        return pending_tasks() == 0 and time.monotonic() - self._last_input >= self.idle_after
+
+    def _wait_until_idle(self):
+        while not self._idle():
+            if self._stopped.wait(POLL_INTERVAL_MS / 1000):
+                return False
+        return not self._stopped.is_set()
+
+    def _lower_priority(self):
+        # Linux schedules threads individually, so this only affects the prefetch thread
+        if sys.platform.startswith('linux'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+            except OSError:
+                pass
+
+    def _run(self):
+        self._lower_priority()
+        set_stage_check(self._check)
+        pending = list(self.views)
+        while pending:
+            if not self._wait_until_idle():
+                return
+            page, option = pending[0]
+            try:
+                with span('prefetch', page=page, option=option, render=self.render) as current:
+                    try:
+                        prefetch_view(page, option, self.render)
+                    except PrefetchInterrupted:
+                        current.record(interrupted=True)
+                        raise
+                    except Exception as error:
+                        current.record(error=str(error))
+                        return
+            except PrefetchInterrupted:
+                # Fetched again from the start once the GUI is idle
+                continue
+            self.fetched.append(pending.pop(0))
+
+
+def start_prefetch(root, views, mode=PREFETCH_MODE):
+    """
+    Start prefetching `views` ((page, option) pairs) after the menu is drawn, unless `mode` is 'off'.
+    Returns the Prefetcher, or None.
+    """
+    if mode not in ('data', 'render'):
+        return None
+    prefetcher = Prefetcher(root, views, render=mode == 'render')
+    root.after_idle(prefetcher.start)
+    return prefetcher
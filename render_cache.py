@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+import downsample
+from data_access import pinned_data_version
+from tracing import span
+from views import VIEWS, build_view
+
+'''
+Cache of rendered views.
+
+Opening a page twice for the same period used to rerun the query, the aggregation and the matplotlib render. A
+rendered view (the page's data frame and its plot as PNG) is now cached under
+
+    (page, option, date_min, date_max, downsampling method, data version of bookings)
+
+- in memory, in an LRU of RENDER_CACHE_SIZE entries (HOTEL_RENDER_CACHE_SIZE, 0 disables the cache);
+- on disk under media/graphics/cache (HOTEL_RENDER_CACHE_DIR), as <version>_<view>.png plus a pickle of the data
+  frame, evicted oldest-used first once the directory exceeds RENDER_CACHE_MAX_BYTES (HOTEL_RENDER_CACHE_MAX_MB).
+
+The data version is part of the key, so any change to bookings makes every entry miss; entries of other versions are
+dropped as soon as a new version is seen. A hit is shown straight from the PNG, without matplotlib. The pages record
+the outcome in their trace and `render_cache.stats()` returns the hit and miss counters.
+
+    data, fig, png, plot_file, key = cached_view('booking_distribution', 'ανά μήνα', date_min, date_max)
+    ...
+    render_cache.put(key, png_bytes, data)   # once the figure is rendered (see figures.show_figure(on_png=...))
+'''
+
+script_dir = os.path.dirname(__file__)
+RENDER_CACHE_DIR = os.environ.get('HOTEL_RENDER_CACHE_DIR', os.path.join(script_dir, 'media', 'graphics', 'cache'))
+RENDER_CACHE_SIZE = int(os.environ.get('HOTEL_RENDER_CACHE_SIZE', 32))
+RENDER_CACHE_MAX_BYTES = int(float(os.environ.get('HOTEL_RENDER_CACHE_MAX_MB', 256)) * 2**20)
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, default=str).encode()).hexdigest()[:16]
+
+def view_key(page, option, date_min, date_max, version):
+    # Only a complete range filters the bookings, as in run_analysis. The downsampling method changes the plot.
+    ranged = date_min is not None and date_max is not None
+    return (page, option, pd.Timestamp(date_min).isoformat() if ranged else None,
+            pd.Timestamp(date_max).isoformat() if ranged else None, downsample.DOWNSAMPLE, tuple(version))
+
+
+class RenderCache:
+    def __init__(self, directory=RENDER_CACHE_DIR, max_entries=RENDER_CACHE_SIZE, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _paths(self, key):
+        stem = os.path.join(self.directory, f"{_digest(key[-1])}_{_digest(key[:-1])}")
+        return f"{stem}.png", f"{stem}.pkl"
+
+    def _see_version(self, version):
+        # A new data version invalidates everything cached for the previous ones
+        if version == self._version:
+            return
+        self._version = version
+        for key in [key for key in self._entries if key[-1] != version]:
+            del self._entries[key]
+        prefix = f"{_digest(version)}_"
+        for name in self._cache_files():
+            if not name.startswith(prefix):
+                self._remove(os.path.join(self.directory, name))
+
+    def _cache_files(self):
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(('.png', '.pkl'))]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return (data, png bytes) cached for `key`, or None.
+        """
+        if not self.max_entries:
+            return None
+        with self._lock:
+            self._see_version(key[-1])
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return entry
+
+            png_path, data_path = self._paths(key)
+            try:
+                with open(png_path, 'rb') as png_file:
+                    png = png_file.read()
+                data = pd.read_pickle(data_path)
+            except (OSError, EOFError, ValueError):
+                self.counters['misses'] += 1
+                return None
+            # Mark as recently used for the size-based eviction
+            os.utime(png_path)
+            entry = (data, png)
+            self._remember(key, entry)
+            self.counters['disk_hits'] += 1
+            return entry
+
+    def put(self, key, png, data):
+        """
+        Cache the rendered view `key`: its PNG bytes and the data frame shown with it.
+        """
+        if not self.max_entries:
+            return
+        with self._lock:
+            if key[-1] != self._version:
+                # Rendered from a version that a later lookup has already replaced
+                return
+            self._remember(key, (data, png))
+
+            os.makedirs(self.directory, exist_ok=True)
+            png_path, data_path = self._paths(key)
+            # The data first: an entry only counts once its PNG is in place
+            data.to_pickle(f"{data_path}.tmp")
+            os.replace(f"{data_path}.tmp", data_path)
+            with open(f"{png_path}.tmp", 'wb') as png_file:
+                png_file.write(png)
+            os.replace(f"{png_path}.tmp", png_path)
+            self._evict()
+
+    def _evict(self):
+        # Least recently used first (the PNG's mtime is refreshed on every disk hit) until the size limit holds
+        entries = {}
+        for name in self._cache_files():
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            stem = os.path.splitext(path)[0]
+            size, used = entries.get(stem, (0, 0))
+            entries[stem] = (size + status.st_size, max(used, status.st_mtime) if name.endswith('.png') else used)
+        total = sum(size for size, used in entries.values())
+        for stem, (size, used) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            self._remove(f"{stem}.png")
+            self._remove(f"{stem}.pkl")
+            total -= size
+            self.counters['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['memory_hits'] + self.counters['disk_hits'] + self.counters['misses']
+            hits = lookups - self.counters['misses']
+            return dict(self.counters, entries=len(self._entries), hit_rate=hits / lookups if lookups else None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self._cache_files():
+                self._remove(os.path.join(self.directory, name))
+
+
+render_cache = RenderCache()
+
+
+def cached_view(page, option=None, date_min=None, date_max=None, **build_options):
+    """
+    Return a view from the render cache, or build it.
+
+    Returns (data, figure, png, plot file name, cache key): on a hit `figure` is None and `png` holds the rendered
+    plot; on a miss `png` is None and the caller should put() the figure's PNG once it is rendered. The key is None
+    when the data version is unknown (nothing is cached then).
+
+    The version is looked up once and reused by the build on a miss. When MySQL is unreachable it is the version of
+    the cached (or snapshot) bookings, so views rendered from them are still served.
+    """
+    with pinned_data_version() as version:
+        key = view_key(page, option, date_min, date_max, version) if version is not None else None
+        with span('render_cache', page=page, option=option) as current:
+            entry = render_cache.get(key) if key is not None else None
+            current.record(hit=entry is not None)
+        if entry is not None:
+            data, png = entry
+            return data.copy(), None, png, VIEWS[page][1][option][2], key
+        data, fig, plot_file = build_view(page, option, date_min, date_max, **build_options)
+    return data, fig, None, plot_file, key
@@ -0,0 +1,136 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import downsample
+from db_connection import upsert_summary_table
+from data_access import load_bookings
+from views import VIEWS, build_view
+
+'''
+Headless batch report.
+
+Renders every GUI view (basic statistics, the four distributions, the four trends and seasonality) without Tk,
+for the total period and for any number of custom arrival date windows:
+
+    python report.py --window 2016-01-01:2016-06-30 --window 2017-01-01:2017-08-31
+
+The bookings are loaded once in the parent process and handed to each worker process once, when it starts, rather
+than once per view. Each worker slices its window, runs the view and saves the figure with matplotlib's Agg
+renderer, so all cores render at once. The summary tables come back to the parent, which writes each one once per
+window.
+
+Total-period output goes where the GUI writes it (media/graphics/*.png, tables/*.csv); each window gets its own
+'<from>_<to>' subdirectory. --upload also refreshes the MySQL summary tables from the total-period results.
+'''
+
+script_dir = os.path.dirname(__file__)
+GRAPHICS_DIR = os.path.join(script_dir, 'media/graphics')
+TABLES_DIR = os.path.join(script_dir, 'tables')
+
+# Set in every worker process by _init_worker
+_bookings = None
+
+
+def parse_window(text):
+    # 'YYYY-MM-DD:YYYY-MM-DD' -> (date_min, date_max)
+    try:
+        date_min, date_max = (pd.Timestamp(part) for part in text.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected YYYY-MM-DD:YYYY-MM-DD, got {text!r}")
+    return date_min, date_max
+
+def window_dir(base_dir, window):
+    if window is None:
+        return base_dir
+    date_min, date_max = window
+    return os.path.join(base_dir, f"{date_min:%Y-%m-%d}_{date_max:%Y-%m-%d}")
+
+def _init_worker(df):
+    global _bookings
+    _bookings = df
+
+def render_view(page, option, window, graphics_dir):
+    # Runs in a worker process
+    if window is None:
+        date_min = date_max = None
+        df = _bookings
+    else:
+        date_min, date_max = window
+        df = _bookings[_bookings['arrival_date'].between(date_min, date_max)].copy()
+
+    data, fig, plot_file = build_view(page, option, date_min, date_max, df=df)
+    plot_path = os.path.join(window_dir(graphics_dir, window), plot_file)
+    os.makedirs(os.path.dirname(plot_path), exist_ok=True)
+    fig.savefig(plot_path)
+    return plot_path, data
+
+def generate_report(windows=(), graphics_dir=GRAPHICS_DIR, tables_dir=TABLES_DIR, workers=None, upload=False):
+    """
+    Render every view for the total period and each window.
+
+    Parameters:
+    - windows (list of tuple): (date_min, date_max) pairs, in addition to the total period.
+    - graphics_dir (str): Where the .png files are written.
+    - tables_dir (str): Where the summary table .csv files are written.
+    - workers (int): Worker processes. Defaults to the number of CPUs.
+    - upload (bool): Also upsert the total-period summary tables into MySQL.
+
+    Returns the list of written files.
+    """
+    start = time.perf_counter()
+    df = load_bookings()
+    print(f"Loaded {len(df)} bookings in {time.perf_counter() - start:.1f}s")
+
+    jobs = [(page, option, window)
+            for window in [None] + list(windows)
+            for page, (view, options, table) in VIEWS.items()
+            for option in options]
+
+    written = []
+    tables_written = set()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as pool:
+        futures = {pool.submit(render_view, page, option, window, graphics_dir): (page, window)
+                   for page, option, window in jobs}
+        for future in as_completed(futures):
+            page, window = futures[future]
+            plot_path, data = future.result()
+            written.append(plot_path)
+            print(plot_path)
+
+            table = VIEWS[page][2]
+            if table is None or (table, window) in tables_written:
+                continue
+            tables_written.add((table, window))
+            csv_path = os.path.join(window_dir(tables_dir, window), f"{table}.csv")
+            os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+            data.to_csv(csv_path, index=False)
+            written.append(csv_path)
+            print(csv_path)
+            if upload and window is None:
+                upsert_summary_table(data, table)
+
+    print(f"Rendered {len(jobs)} views in {time.perf_counter() - start:.1f}s")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Render every analysis view to .png and .csv files without the GUI.")
+    parser.add_argument('--window', action='append', type=parse_window, default=[], metavar='FROM:TO',
+                        help="Custom arrival date window, e.g. 2016-01-01:2016-06-30 (repeatable)")
+    parser.add_argument('--graphics-dir', default=GRAPHICS_DIR, help="Directory for the plots")
+    parser.add_argument('--tables-dir', default=TABLES_DIR, help="Directory for the summary tables")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--upload', action='store_true', help="Upsert the total-period summary tables into MySQL")
+    parser.add_argument('--exact', action='store_true', help="Plot every point of the trends (no downsampling)")
+    args = parser.parse_args()
+
+    if args.exact:
+        # The environment reaches workers started by spawn, the module attribute those started by fork
+        os.environ['HOTEL_PLOT_DOWNSAMPLE'] = 'off'
+        downsample.DOWNSAMPLE = 'off'
+
+    generate_report(args.window, args.graphics_dir, args.tables_dir, args.workers, args.upload)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import json
+import os
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+from tracing import span
+
+'''
+Local columnar snapshot of the bookings analysis columns.
+
+After every full read from MySQL the projected bookings frame is written to an uncompressed Feather (Arrow IPC)
+file tagged with the data version it was read at (see data_access.get_data_version). On the next cold start
+data_access reads this file through a memory map instead of converting every row from the MySQL protocol, and only
+goes back to the database for the rows added since that version (or for everything, after deletes or updates).
+When MySQL cannot be reached the snapshot is served as is, so the GUI and hotel_booking.ipynb keep working offline:
+
+    from snapshot import load_snapshot
+    df = load_snapshot()
+
+Snapshots need pyarrow; without it every function here reports that no snapshot is available. Every function
+defaults to SNAPSHOT_PATH as it is at call time, so a process can point it elsewhere (benchmark.py does).
+'''
+
+script_dir = os.path.dirname(__file__)
+SNAPSHOT_PATH = os.environ.get('HOTEL_SNAPSHOT_PATH', os.path.join(script_dir, 'snapshots', 'bookings.feather'))
+VERSION_KEY = b'data_version'
+
+
+def snapshot_available(path=None):
+    path = path or SNAPSHOT_PATH
+    return pa is not None and os.path.exists(path)
+
+def snapshot_version(path=None, columns=None):
+    # Reads only the schema footer, not the data. None as well when the snapshot lacks any of `columns`.
+    path = path or SNAPSHOT_PATH
+    if not snapshot_available(path):
+        return None
+    with pa.memory_map(path) as source:
+        schema = pa.ipc.open_file(source).schema
+    if columns is not None and not set(columns) <= set(schema.names):
+        return None
+    version = (schema.metadata or {}).get(VERSION_KEY)
+    return tuple(json.loads(version)) if version else None
+
+def save_snapshot(df, version, path=None):
+    path = path or SNAPSHOT_PATH
+    if pa is None:
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[VERSION_KEY] = json.dumps(list(version)).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write next to the target and swap it in, so readers never see a half-written file
+    temporary_path = f"{path}.tmp"
+    with span('save_snapshot') as current:
+        feather.write_feather(table, temporary_path, compression='uncompressed')
+        os.replace(temporary_path, path)
+        current.record(rows=table.num_rows, bytes=table.nbytes)
+    return True
+
+def load_snapshot(columns=None, path=None):
+    """
+    Read the snapshot into a DataFrame through a memory map.
+
+    Parameters:
+    - columns (list of str): Columns to read. All columns when omitted.
+    """
+    path = path or SNAPSHOT_PATH
+    if not snapshot_available(path):
+        raise FileNotFoundError(f"No bookings snapshot at {path}")
+    with span('load_snapshot') as current:
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        df = table.to_pandas()
+        current.record(df)
+    return df
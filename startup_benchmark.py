@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+'''
+Startup benchmark of the GUI: time to first paint of the main menu.
+
+Each run starts a fresh interpreter with `main_menu.py --first-paint`, which builds the menu, waits until Tk has
+mapped and drawn it, prints the analysis modules it had imported by then and exits. The time from launching the
+process to reading that line is the time a user waits for the menu, interpreter start-up included.
+
+Every combination of startup mode (HOTEL_STARTUP_MODE, see main_menu.py) and asset cache state is measured:
+
+- cold: the resized-background cache (assets.py) is emptied before every run, so the JPEG is decoded and resized;
+- warm: the cache is filled by the previous run, so the menu background is read from a cached PNG.
+
+    python startup_benchmark.py --runs 5 --output startup_results.json
+
+Needs a display (on a headless machine run it under xvfb-run).
+'''
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+MODES = ['lazy', 'eager']
+CACHE_STATES = ['cold', 'warm']
+
+
+def time_first_paint(mode, cache_dir):
+    """
+    Launch the GUI once and return (seconds to first paint, modules loaded before it).
+
+    Parameters:
+    - mode (str): HOTEL_STARTUP_MODE of the launched GUI.
+    - cache_dir (str): HOTEL_ASSET_CACHE_DIR of the launched GUI.
+    """
+    env = dict(os.environ, HOTEL_STARTUP_MODE=mode, HOTEL_ASSET_CACHE_DIR=cache_dir, HOTEL_TRACE_LOG='')
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(script_dir, 'main_menu.py'), '--first-paint'],
+        stdout=subprocess.PIPE, text=True, env=env, cwd=script_dir
+    )
+    line = process.stdout.readline()
+    seconds = time.perf_counter() - started
+    process.wait()
+    if process.returncode != 0 or not line:
+        raise RuntimeError(f"main_menu.py --first-paint failed with exit code {process.returncode}")
+    return seconds, json.loads(line)['loaded']
+
+def run_startup_benchmark(runs=5):
+    """
+    Time `runs` launches for every startup mode and cache state and return the machine-readable report.
+    """
+    results = []
+    work_dir = tempfile.mkdtemp(prefix='hotel-startup-')
+    try:
+        for mode in MODES:
+            for state in CACHE_STATES:
+                cache_dir = os.path.join(work_dir, f'{mode}-{state}')
+                if state == 'warm':
+                    # One untimed launch fills the cache
+                    time_first_paint(mode, cache_dir)
+                timings = []
+                for _ in range(runs):
+                    if state == 'cold':
+                        shutil.rmtree(cache_dir, ignore_errors=True)
+                    seconds, loaded = time_first_paint(mode, cache_dir)
+                    timings.append(seconds)
+                result = {
+                    'mode': mode,
+                    'cache': state,
+                    'median_seconds': round(statistics.median(timings), 6),
+                    'min_seconds': round(min(timings), 6),
+                    'seconds': [round(seconds, 6) for seconds in timings],
+                    'loaded': loaded,
+                }
+                results.append(result)
+                print(f"{mode:<6} {state:<5} median={result['median_seconds']:.3f}s min={result['min_seconds']:.3f}s "
+                      f"loaded={','.join(loaded) or '-'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {'python': sys.version.split()[0], 'runs': runs, 'results': results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first paint of the main menu.")
+    parser.add_argument('--runs', type=int, default=5, help="Launches per startup mode and cache state")
+    parser.add_argument('--output', help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    report = run_startup_benchmark(args.runs)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as results_file:
+            json.dump(report, results_file, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
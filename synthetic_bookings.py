@@ -0,0 +1,202 @@
+import argparse
+import numpy as np
+import pandas as pd
+from db_connection import BOOKING_COLUMNS, MONTH_ORDER
+
+'''
+Synthetic bookings generator.
+
+Produces rows with the schema of the `bookings` table (create_db.sql) whose distributions follow the original
+hotel_booking.csv sample: the City/Resort profiles, the summer peak, cancellation rates, lead times, party sizes,
+room types, market segments and so on. Any number of hotels can be generated; beyond the first two they alternate
+between the city and the resort profile ('Hotel 3', 'Hotel 4', ...).
+
+Rows are produced in chunks, so 10M rows can be streamed to a CSV (for insert_data_to_DB.py) or a stand-in
+database without holding them all in memory:
+
+    python synthetic_bookings.py --rows 1000000 --hotels 4 --csv synthetic_1M.csv
+
+The generator is deterministic for a given seed, rows and chunk size.
+'''
+
+DEFAULT_CHUNK_SIZE = 500000
+FIRST_ARRIVAL = '2015-07-01'
+LAST_ARRIVAL = '2017-08-31'
+
+# Relative arrival volume per month (August peak, January low)
+MONTH_WEIGHTS = [0.050, 0.068, 0.082, 0.093, 0.099, 0.092, 0.106, 0.116, 0.088, 0.093, 0.057, 0.057]
+
+PROFILES = {
+    'city': {
+        'share': 0.66, 'cancel_rate': 0.42, 'lead_time_scale': 115, 'weekend_nights': 0.8, 'week_nights': 2.2,
+        'adr': 105.0, 'summer_adr': 1.1,
+        'room_types': (['A', 'B', 'D', 'E', 'F', 'G', 'P'], [0.778, 0.013, 0.150, 0.020, 0.025, 0.013, 0.001]),
+    },
+    'resort': {
+        'share': 0.34, 'cancel_rate': 0.28, 'lead_time_scale': 100, 'weekend_nights': 1.2, 'week_nights': 3.1,
+        'adr': 95.0, 'summer_adr': 1.6,
+        'room_types': (['A', 'C', 'D', 'E', 'F', 'G', 'H', 'L', 'P'],
+                       [0.579, 0.024, 0.183, 0.123, 0.027, 0.039, 0.015, 0.005, 0.005]),
+    },
+}
+
+# Column -> (values, probabilities) for the columns drawn independently of the hotel
+CHOICES = {
+    'adults': ([0, 1, 2, 3, 4], [0.004, 0.190, 0.750, 0.053, 0.003]),
+    'children': ([0, 1, 2, 3], [0.928, 0.041, 0.030, 0.001]),
+    'babies': ([0, 1, 2], [0.992, 0.0075, 0.0005]),
+    'meal': (['BB', 'HB', 'SC', 'Undefined', 'FB'], [0.773, 0.121, 0.089, 0.010, 0.007]),
+    'country': (['PRT', 'GBR', 'FRA', 'ESP', 'DEU', 'ITA', 'IRL', 'BEL', 'BRA', 'NLD', 'USA', 'CHE', 'CN', 'AUT',
+                 'SWE', 'CHN', 'POL', 'ISR', 'RUS', 'NOR', 'GRC', None],
+                [0.407, 0.102, 0.087, 0.072, 0.061, 0.032, 0.028, 0.020, 0.019, 0.018, 0.018, 0.017, 0.011, 0.013,
+                 0.009, 0.008, 0.008, 0.006, 0.005, 0.005, 0.050, 0.004]),
+    'market_segment': (['Online TA', 'Offline TA/TO', 'Groups', 'Direct', 'Corporate', 'Complementary', 'Aviation'],
+                       [0.473, 0.203, 0.166, 0.106, 0.044, 0.006, 0.002]),
+    'distribution_channel': (['TA/TO', 'Direct', 'Corporate', 'GDS'], [0.8194, 0.1230, 0.0560, 0.0016]),
+    'previous_cancellations': ([0, 1, 2, 3], [0.946, 0.051, 0.002, 0.001]),
+    'previous_bookings_not_canceled': ([0, 1, 2, 3, 4, 5], [0.970, 0.012, 0.006, 0.004, 0.004, 0.004]),
+    'booking_changes': ([0, 1, 2, 3, 4], [0.848, 0.107, 0.032, 0.008, 0.005]),
+    'customer_type': (['Transient', 'Transient-Party', 'Contract', 'Group'], [0.750, 0.210, 0.034, 0.006]),
+    'required_car_parking_spaces': ([0, 1, 2], [0.938, 0.0617, 0.0003]),
+    'total_of_special_requests': ([0, 1, 2, 3, 4, 5], [0.589, 0.278, 0.109, 0.021, 0.0027, 0.0003]),
+}
+
+POPULAR_AGENTS = [9, 240, 1, 14, 7, 6, 250, 241, 28, 8]
+
+
+def hotel_names(n_hotels):
+    names = ['City Hotel', 'Resort Hotel'] + [f'Hotel {i}' for i in range(3, n_hotels + 1)]
+    return names[:n_hotels]
+
+def _choice(rng, column, size):
+    values, p = CHOICES[column]
+    p = np.asarray(p) / np.sum(p)
+    if None in values:
+        # Object array so None survives as NULL
+        return rng.choice(np.array(values, dtype=object), size, p=p)
+    return rng.choice(values, size, p=p)
+
+def _arrival_dates(rng, size, first_arrival, last_arrival):
+    months = pd.period_range(first_arrival, last_arrival, freq='M')
+    weights = np.array([MONTH_WEIGHTS[month.month - 1] for month in months])
+    picked = months[rng.choice(len(months), size, p=weights / weights.sum())]
+    day = (rng.random(size) * picked.days_in_month).astype(int) + 1
+    return pd.to_datetime(pd.DataFrame({'year': picked.year, 'month': picked.month, 'day': day}))
+
+def generate_bookings(n_rows, n_hotels=2, seed=0, first_id=1, personal=True,
+                      first_arrival=FIRST_ARRIVAL, last_arrival=LAST_ARRIVAL):
+    """
+    Generate one DataFrame of synthetic bookings with the BOOKING_COLUMNS (plus `id`).
+
+    Parameters:
+    - n_rows (int): Number of bookings.
+    - n_hotels (int): Number of hotels; the first two are 'City Hotel' and 'Resort Hotel'.
+    - seed (int): Random seed.
+    - first_id (int): `id` of the first row, so consecutive chunks get consecutive ids.
+    - personal (bool): Fill name, email, phone_number and credit_card with fake values; NULL otherwise.
+    - first_arrival, last_arrival: Range of the arrival dates.
+    """
+    rng = np.random.default_rng(seed)
+    names = hotel_names(n_hotels)
+    profiles = [PROFILES['city'] if i % 2 == 0 else PROFILES['resort'] for i in range(n_hotels)]
+    shares = np.array([profile['share'] for profile in profiles])
+    hotel_index = rng.choice(n_hotels, n_rows, p=shares / shares.sum())
+
+    def per_hotel(key):
+        return np.array([profile[key] for profile in profiles])[hotel_index]
+
+    df = pd.DataFrame({'id': np.arange(first_id, first_id + n_rows)})
+    df['hotel'] = np.array(names, dtype=object)[hotel_index]
+    df['is_canceled'] = (rng.random(n_rows) < per_hotel('cancel_rate')).astype(int)
+    df['lead_time'] = np.clip(rng.gamma(0.9, per_hotel('lead_time_scale')), 0, 737).astype(int)
+
+    arrival = _arrival_dates(rng, n_rows, first_arrival, last_arrival)
+    df['arrival_date_year'] = arrival.dt.year
+    df['arrival_date_month'] = np.array(MONTH_ORDER, dtype=object)[arrival.dt.month - 1]
+    df['arrival_date_week_number'] = arrival.dt.isocalendar().week.astype(int).to_numpy()
+    df['arrival_date_day_of_month'] = arrival.dt.day
+    df['stays_in_weekend_nights'] = rng.poisson(per_hotel('weekend_nights'))
+    df['stays_in_week_nights'] = rng.poisson(per_hotel('week_nights'))
+
+    for column in ['adults', 'children', 'babies', 'meal', 'country', 'market_segment', 'distribution_channel']:
+        df[column] = _choice(rng, column, n_rows)
+    # A handful of bookings have no children count in the original data
+    df['children'] = df['children'].astype(float).mask(rng.random(n_rows) < 0.00003)
+
+    df['is_repeated_guest'] = (rng.random(n_rows) < 0.032).astype(int)
+    df['previous_cancellations'] = _choice(rng, 'previous_cancellations', n_rows)
+    df['previous_bookings_not_canceled'] = _choice(rng, 'previous_bookings_not_canceled', n_rows)
+
+    reserved = np.empty(n_rows, dtype=object)
+    for i, profile in enumerate(profiles):
+        rows = hotel_index == i
+        room_types, p = profile['room_types']
+        reserved[rows] = rng.choice(room_types, rows.sum(), p=np.asarray(p) / np.sum(p))
+    df['reserved_room_type'] = reserved
+    # About one booking in eight is given a different room on arrival
+    reassigned = rng.random(n_rows) < 0.125
+    df['assigned_room_type'] = np.where(reassigned, rng.choice(list('ABCDEFGHIK'), n_rows), reserved)
+
+    df['booking_changes'] = _choice(rng, 'booking_changes', n_rows)
+    # Non-refundable deposits are far more common among cancelled bookings
+    non_refund = rng.random(n_rows) < np.where(df['is_canceled'] == 1, 0.25, 0.005)
+    refundable = ~non_refund & (rng.random(n_rows) < 0.0014)
+    df['deposit_type'] = np.select([non_refund, refundable], ['Non Refund', 'Refundable'], default='No Deposit').astype(object)
+
+    agent = np.where(rng.random(n_rows) < 0.9, rng.choice(POPULAR_AGENTS, n_rows), rng.integers(1, 536, n_rows))
+    df['agent'] = pd.Series(agent, dtype=float).mask(rng.random(n_rows) < 0.137)
+    df['company'] = pd.Series(rng.integers(1, 544, n_rows), dtype=float).mask(rng.random(n_rows) < 0.943)
+    df['days_in_waiting_list'] = np.where(rng.random(n_rows) < 0.969, 0, rng.integers(1, 392, n_rows))
+    df['customer_type'] = _choice(rng, 'customer_type', n_rows)
+
+    summer = arrival.dt.month.isin([6, 7, 8]).to_numpy()
+    adr = per_hotel('adr') * np.where(summer, per_hotel('summer_adr'), 1.0) + rng.normal(0, 35, n_rows)
+    df['adr'] = np.round(np.clip(adr, 0, None), 2)
+    df['required_car_parking_spaces'] = _choice(rng, 'required_car_parking_spaces', n_rows)
+    df['total_of_special_requests'] = _choice(rng, 'total_of_special_requests', n_rows)
+
+    canceled = df['is_canceled'].to_numpy() == 1
+    no_show = canceled & (rng.random(n_rows) < 0.027)
+    df['reservation_status'] = np.select([no_show, canceled], ['No-Show', 'Canceled'], default='Check-Out').astype(object)
+    nights = df['stays_in_weekend_nights'] + df['stays_in_week_nights']
+    cancelled_days_before = (rng.random(n_rows) * (df['lead_time'] + 1)).astype(int)
+    offset_days = np.select([no_show, canceled], [0, -cancelled_days_before], default=nights)
+    df['reservation_status_date'] = (arrival + pd.to_timedelta(offset_days, unit='D')).dt.date
+
+    if personal:
+        guest = df['id'].astype(str)
+        df['name'] = 'Guest ' + guest
+        df['email'] = 'guest' + guest + '@example.com'
+        df['phone_number'] = '69' + pd.Series(rng.integers(10**7, 10**8, n_rows)).astype(str)
+        df['credit_card'] = '************' + pd.Series(rng.integers(1000, 10000, n_rows)).astype(str)
+    else:
+        for column in ['name', 'email', 'phone_number', 'credit_card']:
+            df[column] = None
+
+    return df[['id'] + BOOKING_COLUMNS]
+
+def iter_bookings(n_rows, n_hotels=2, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, personal=True):
+    # Yields generate_bookings() chunks of at most chunk_size rows with consecutive ids
+    for chunk_number, start in enumerate(range(0, n_rows, chunk_size)):
+        size = min(chunk_size, n_rows - start)
+        yield generate_bookings(size, n_hotels, seed=seed + chunk_number, first_id=start + 1, personal=personal)
+
+def write_csv(csv_path, n_rows, n_hotels=2, seed=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Same layout as hotel_booking.csv, so the file can be loaded with insert_data_to_DB.py
+    for chunk_number, chunk in enumerate(iter_bookings(n_rows, n_hotels, seed, chunk_size)):
+        chunk[BOOKING_COLUMNS].to_csv(csv_path, mode='w' if chunk_number == 0 else 'a', header=chunk_number == 0, index=False)
+        print(f"Wrote {chunk['id'].iloc[-1]}/{n_rows} rows")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic hotel bookings with the schema of the bookings table.")
+    parser.add_argument('--rows', type=int, default=100000, help="Number of bookings")
+    parser.add_argument('--hotels', type=int, default=2, help="Number of hotels")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows generated at a time")
+    parser.add_argument('--csv', default='synthetic_bookings.csv', help="Output CSV path")
+    args = parser.parse_args()
+
+    write_csv(args.csv, args.rows, args.hotels, args.seed, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
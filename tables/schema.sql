@@ -35,6 +35,42 @@ CREATE TABLE `basic_statistics` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `booking_cube`
+--
+
+DROP TABLE IF EXISTS `booking_cube`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `booking_cube` (
+  `hotel` varchar(255) NOT NULL,
+  `arrival_date` date NOT NULL,
+  `arrival_date_year` int NOT NULL,
+  `arrival_date_month` varchar(16) NOT NULL,
+  `reserved_room_type` varchar(32) NOT NULL,
+  `party_type` varchar(64) NOT NULL,
+  `bookings` bigint NOT NULL,
+  `cancellations` bigint NOT NULL,
+  `nights` bigint NOT NULL,
+  `first_id` bigint NOT NULL,
+  PRIMARY KEY (`hotel`,`arrival_date`,`reserved_room_type`,`party_type`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `booking_cube_state`
+--
+
+DROP TABLE IF EXISTS `booking_cube_state`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `booking_cube_state` (
+  `max_id` bigint NOT NULL,
+  `row_count` bigint NOT NULL,
+  `max_updated_at` varchar(32) DEFAULT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `booking_distribution`
 --
@@ -101,7 +137,11 @@ CREATE TABLE `bookings` (
   `email` varchar(255) DEFAULT NULL,
   `phone_number` varchar(255) DEFAULT NULL,
   `credit_card` varchar(255) DEFAULT NULL,
-  PRIMARY KEY (`id`)
+  `arrival_date` date GENERATED ALWAYS AS ((makedate(`arrival_date_year`,1) + interval (field(`arrival_date_month`,_utf8mb4'January',_utf8mb4'February',_utf8mb4'March',_utf8mb4'April',_utf8mb4'May',_utf8mb4'June',_utf8mb4'July',_utf8mb4'August',_utf8mb4'September',_utf8mb4'October',_utf8mb4'November',_utf8mb4'December') - 1) month)) STORED,
+  `updated_at` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (`id`),
+  KEY `idx_bookings_hotel_arrival_date` (`hotel`,`arrival_date`),
+  KEY `idx_bookings_updated_at` (`updated_at`)
 ) ENGINE=InnoDB AUTO_INCREMENT=119391 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 /*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
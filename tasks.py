@@ -0,0 +1,125 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+'''
+Background task runner for the GUI.
+
+Tkinter may only be touched from the thread running mainloop(), so database reads, pandas aggregation and figure
+building are submitted to a small thread pool instead. The runner polls the pending futures with root.after() and
+calls the completion callbacks back on the Tk thread.
+
+Every task belongs to a widget (normally the page's Toplevel). Destroying that widget cancels its tasks: tasks
+that have not started are dropped, running ones see `task.cancelled` set (and may stop early through
+`task.check()`), and their results are discarded instead of being delivered to a dead window.
+'''
+
+POLL_INTERVAL_MS = 50
+MAX_WORKERS = 4
+
+
+class Task:
+    def __init__(self, owner, func, on_done, on_error):
+        self.owner = owner
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = threading.Event()
+        self.future = None
+
+    def check(self):
+        # Called by the work function between stages to stop as soon as the window is gone
+        if self.cancelled.is_set():
+            raise CancelledError()
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class TaskRunner:
+    def __init__(self, root, max_workers=MAX_WORKERS, poll_interval=POLL_INTERVAL_MS):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gui-task')
+        self._pending = []
+        self._owners = set()
+        self._polling = False
+
+    def submit(self, owner, func, on_done, on_error=None):
+        '''
+        Run `func(task)` on a worker thread and deliver its result to `on_done(result)` on the Tk thread.
+        Exceptions go to `on_error(exception)`, or to Tk's report_callback_exception when no handler is given.
+        Must be called from the Tk thread.
+        '''
+        task = Task(owner, func, on_done, on_error)
+        task.future = self._executor.submit(func, task)
+        self._pending.append(task)
+
+        if owner not in self._owners:
+            self._owners.add(owner)
+            owner.bind('<Destroy>', lambda event: self._on_destroy(event, owner), add='+')
+
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+        return task
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def cancel_owner(self, owner):
+        for task in self._pending:
+            if task.owner is owner:
+                task.cancel()
+        self._owners.discard(owner)
+
+    def _on_destroy(self, event, owner):
+        # <Destroy> is also delivered for every child widget of a Toplevel
+        if event.widget is owner:
+            self.cancel_owner(owner)
+
+    def _poll(self):
+        finished, pending = [], []
+        for task in self._pending:
+            (finished if task.future.done() else pending).append(task)
+        self._pending = pending
+
+        if self._pending:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+        for task in finished:
+            if not task.cancelled.is_set():
+                self._deliver(task)
+
+    def _deliver(self, task):
+        try:
+            result = task.future.result()
+        except CancelledError:
+            return
+        except Exception as error:
+            if task.on_error is not None:
+                task.on_error(error)
+            else:
+                self.root.report_callback_exception(type(error), error, error.__traceback__)
+            return
+        task.on_done(result)
+
+
+_runner = None
+
+def get_task_runner(widget):
+    # One runner per process, polling on the application's root window
+    global _runner
+    if _runner is None:
+        _runner = TaskRunner(widget._root())
+    return _runner
+
+def run_in_background(owner, func, on_done, on_error=None):
+    return get_task_runner(owner).submit(owner, func, on_done, on_error)
+
+def pending_tasks():
+    # Tasks submitted by the pages and not delivered yet; safe to read from any thread
+    return _runner.pending_count() if _runner is not None else 0
@@ -0,0 +1,51 @@
+import os
+import tkinter as tk
+from tracing import format_span_tree
+
+'''
+Performance overlay for the analysis windows.
+
+Press F12 in any analysis window to show or hide a panel listing the tracing spans of that window (see
+tracing.py): every stage with its wall time, rows, bytes and, with HOTEL_TRACE_MEMORY=1, peak memory ('n/a' for
+stages that overlapped traced work on other threads, whose peak cannot be told apart). While it is visible the panel
+refreshes itself, so stages that finish later show up too. Set HOTEL_TRACE_OVERLAY=1 to open it
+in every new window.
+'''
+
+SHOW_OVERLAY = os.environ.get('HOTEL_TRACE_OVERLAY', '0') == '1'
+REFRESH_MS = 500
+
+
+class PerformanceOverlay:
+    def __init__(self, window, trace, key='<F12>'):
+        self.window = window
+        self.trace = trace
+        self.text = None
+        self._shown_count = None
+        window.bind(key, lambda event: self.toggle(), add='+')
+        if SHOW_OVERLAY:
+            self.toggle()
+
+    def toggle(self):
+        if self.text is not None:
+            self.text.destroy()
+            self.text = None
+            return
+        self.text = tk.Text(self.window, height=12, font=("Courier", 10), bg='#1E1E1E', fg='#9CDC7C', borderwidth=0)
+        self.text.place(relx=0, rely=1, relwidth=1, anchor='sw')
+        self._shown_count = None
+        self.refresh()
+
+    def refresh(self):
+        # Polls on the Tk thread; spans themselves finish on worker threads
+        if self.text is None or not self.text.winfo_exists():
+            return
+        roots = self.trace.roots()
+        if len(roots) != self._shown_count:
+            self._shown_count = len(roots)
+            lines = format_span_tree(roots) or ["Καμία μέτρηση ακόμη..."]
+            self.text.configure(state='normal', height=min(len(lines), 20) + 1)
+            self.text.delete('1.0', 'end')
+            self.text.insert('end', "F12: απόκρυψη\n" + '\n'.join(lines))
+            self.text.configure(state='disabled')
+        self.window.after(REFRESH_MS, self.refresh)
@@ -0,0 +1,241 @@
+import cProfile
+import datetime
+import io
+import json
+import os
+import platform
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+
+'''
+Lightweight tracing spans for the data and rendering stages.
+
+A span measures one stage: wall time and, when it is told about them, the rows and bytes it handled.
+
+    with span('retrieve_booking_data') as current:
+        df = ...
+        current.record(df)
+
+Spans opened while another span is active on the same thread become its children, so a window's load shows up as
+one tree (query, dtypes, analysis, figure, upload). Because every stage opens a span, a thread can register a check
+with set_stage_check() that runs before each one; background work uses it to stop between stages. Finished root spans are:
+
+- appended to the JSON-lines log (HOTEL_TRACE_LOG, logs/trace.jsonl by default; set it empty to disable), one
+  line per tree, tagged with host and pid so logs from several desktops can be collected and compared;
+- added to the `Trace` they were opened through, which is what the per-window performance overlay shows.
+
+Optional, because they cost time themselves:
+
+- HOTEL_TRACE_MEMORY=1 starts tracemalloc and records the peak traced memory of every span (bytes above what was
+  allocated when the span started). tracemalloc has a single process-wide peak, so it is only recorded for spans
+  whose whole tree ran while no other thread had a span open; spans that overlapped other traced work (another
+  window loading, a PNG export, the prefetcher) get no peak.
+- HOTEL_TRACE_PROFILE=<rate> runs cProfile on that fraction of root spans (e.g. 0.1) and stores the top functions
+  by cumulative time with the span.
+'''
+
+script_dir = os.path.dirname(__file__)
+TRACE_LOG = os.environ.get('HOTEL_TRACE_LOG', os.path.join(script_dir, 'logs', 'trace.jsonl'))
+TRACE_MEMORY = os.environ.get('HOTEL_TRACE_MEMORY', '0') == '1'
+PROFILE_RATE = float(os.environ.get('HOTEL_TRACE_PROFILE', 0))
+PROFILE_LINES = 20
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+# Root spans open right now and ever opened, across threads; a peak is only valid while a tree runs alone
+_memory_lock = threading.Lock()
+_memory_state = {'open': 0, 'opened': 0}
+
+
+def set_stage_check(check):
+    # check() runs on this thread before every span opens, i.e. between stages; raising from it abandons the work
+    _local.check = check
+
+def current_span():
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+class Span:
+    def __init__(self, name, trace=None, **attributes):
+        self.name = name
+        self.trace = trace
+        self.attributes = attributes
+        self.parent = None
+        self.children = []
+        self.rows = None
+        self.bytes = None
+        self.seconds = None
+        self.peak_bytes = None
+        self.profile = None
+        self.started_at = None
+        self._profiler = None
+
+    def record(self, df=None, rows=None, bytes=None, **attributes):
+        # Rows/bytes handled by the stage; a DataFrame gives both (shallow size, so it stays cheap)
+        if df is not None:
+            rows = len(df)
+            bytes = int(df.memory_usage(index=True, deep=False).sum())
+        if rows is not None:
+            self.rows = rows
+        if bytes is not None:
+            self.bytes = bytes
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        check = getattr(_local, 'check', None)
+        if check is not None:
+            check()
+        self.parent = current_span()
+        if not hasattr(_local, 'stack'):
+            _local.stack = []
+        _local.stack.append(self)
+
+        if TRACE_MEMORY:
+            with _memory_lock:
+                if self.parent is None:
+                    _memory_state['open'] += 1
+                    _memory_state['opened'] += 1
+                self._measure_memory = _memory_state['open'] == 1
+                self._opened = _memory_state['opened']
+            if self._measure_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                if self.parent is not None and self.parent._measure_memory:
+                    # Resetting the peak below would hide the parent's peak so far; hand it over first
+                    self.parent._peak_seen = max(self.parent._peak_seen, peak)
+                tracemalloc.reset_peak()
+                self._memory_start = current
+                self._peak_seen = current
+
+        if self.parent is None and PROFILE_RATE and random.random() < PROFILE_RATE:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.seconds = time.perf_counter() - self._started
+        _local.stack.pop()
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(self._profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_LINES)
+            self.profile = output.getvalue()
+            self._profiler = None
+
+        if TRACE_MEMORY:
+            with _memory_lock:
+                # No other root span was opened meanwhile, so the process-wide peak is this span's
+                alone = self._measure_memory and _memory_state['opened'] == self._opened
+                if self.parent is None:
+                    _memory_state['open'] -= 1
+            if alone:
+                peak = max(self._peak_seen, tracemalloc.get_traced_memory()[1])
+                self.peak_bytes = peak - self._memory_start
+                if self.parent is not None and self.parent._measure_memory:
+                    self.parent._peak_seen = max(self.parent._peak_seen, peak)
+
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+
+        if self.parent is not None:
+            self.parent.children.append(self)
+        else:
+            if self.trace is not None:
+                self.trace.add(self)
+            write_log(self)
+        return False
+
+    def to_dict(self):
+        record = {'name': self.name, 'seconds': round(self.seconds, 6)}
+        for key in ('rows', 'bytes', 'peak_bytes', 'profile'):
+            value = getattr(self, key)
+            if value is not None:
+                record[key] = value
+        if self.attributes:
+            record['attributes'] = self.attributes
+        if self.children:
+            record['children'] = [child.to_dict() for child in self.children]
+        return record
+
+    def walk(self, depth=0):
+        # (depth, span) for this span and its descendants, depth-first
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+class Trace:
+    '''
+    Collects the root spans of one window (or any other unit of work). Spans opened with trace.span() outside of
+    any other span belong to it.
+    '''
+    def __init__(self, name):
+        self.name = name
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def span(self, name, **attributes):
+        return Span(f"{self.name}.{name}", trace=self, **attributes)
+
+    def add(self, root):
+        with self._lock:
+            self._spans.append(root)
+
+    def roots(self):
+        with self._lock:
+            return list(self._spans)
+
+
+def span(name, **attributes):
+    return Span(name, **attributes)
+
+
+def write_log(root):
+    if not TRACE_LOG:
+        return
+    record = {
+        'time': datetime.datetime.fromtimestamp(root.started_at).isoformat(timespec='milliseconds'),
+        'host': platform.node(),
+        'pid': os.getpid(),
+        'thread': threading.current_thread().name,
+    }
+    record.update(root.to_dict())
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _log_lock:
+        try:
+            os.makedirs(os.path.dirname(TRACE_LOG) or '.', exist_ok=True)
+            with open(TRACE_LOG, 'a', encoding='utf-8') as log_file:
+                log_file.write(line + '\n')
+        except OSError:
+            # Tracing must never break the application
+            pass
+
+
+def format_span_tree(roots):
+    # Text lines for the overlay: name, time, rows, bytes, peak memory
+    lines = []
+    for root in roots:
+        for depth, current in root.walk():
+            details = [f"{current.seconds * 1000:8.1f} ms"]
+            if current.rows is not None:
+                details.append(f"{current.rows} rows")
+            if current.bytes is not None:
+                details.append(f"{current.bytes / 2**20:.1f} MiB")
+            if current.peak_bytes is not None:
+                details.append(f"peak {current.peak_bytes / 2**20:.1f} MiB")
+            elif TRACE_MEMORY:
+                details.append("peak n/a (concurrent)")
+            lines.append(f"{'  ' * depth}{current.name:<{max(40 - 2 * depth, 1)}} {'  '.join(details)}")
+    return lines
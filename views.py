@@ -0,0 +1,488 @@
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from data_access import load_bookings, pinned_data_version
+from tracing import span
+from downsample import downsample_series
+from features import OTHER_PARTY, add_derived_columns
+from analyses import (run_analysis, cube_frame, BASIC_STATISTICS, MONTHLY_DISTRIBUTION, SEASONAL_DISTRIBUTION,
+                      ROOM_TYPE_DISTRIBUTION, CLIENT_DISTRIBUTION, DAILY_TRENDS, WEEKLY_TRENDS, MONTHLY_TRENDS,
+                      YEARLY_TRENDS, SEASONAL_TRENDS, SEASONALITY)
+
+'''
+The views behind the GUI pages, without any Tk.
+
+A view is one page (and option) of the GUI: its data stage (analysis, summary table) and its figure, kept as two
+separate steps so they can also be run (and measured) on their own. The pages in
+main_menu.py run a view on a worker thread and only embed the result; report.py runs every view headless in a
+process pool. Figures are created through `new_figure(figsize=...)`, a plain matplotlib Figure by default, so
+nothing here needs pyplot or a display. The GUI passes figure_manager.new_figure instead.
+
+    basic_stats, fig, plot_file = build_view('basic_statistics', None, date_min, date_max)
+
+`df` may be given to share an already loaded (and already range-filtered) bookings frame; it is loaded through
+load_bookings() otherwise.
+'''
+
+DISTRIBUTION_COLUMNS = ['hotel', 'arrival_date_month', 'season', 'reserved_room_type', 'party_type']
+
+
+def plot_basic_statistics(basic_stats, new_figure=Figure):
+    fig = new_figure(figsize=(7, 5))
+    ax1, ax2 = fig.subplots(2, 1)
+
+    # Average Nights Spent per Hotel
+    bars1 = ax1.bar(basic_stats['hotel'], basic_stats['average_nights'], color='g', alpha=0.6, label='Average Nights Spent')
+    ax1.set_xlabel('Ξενοδοχείο')
+    ax1.set_ylabel('Μ.Ο. Διανυκτερεύσεων')
+    ax1.set_title('Διανυκτερεύσεις ανά Ξενοδοχείο')
+
+    for bar in bars1:
+        height = bar.get_height()
+        ax1.annotate(f'{height:.2f}', 
+                    xy=(bar.get_x() + bar.get_width() / 2, height), 
+                    xytext=(0, 3), 
+                    textcoords="offset points", 
+                    ha='center', va='bottom')
+
+    # Cancellation Percentage per Hotel
+    bars2 = ax2.bar(basic_stats['hotel'], basic_stats['cancellation_percentage'], color='r', alpha=0.6, label='Cancellation Percentage')
+    ax2.set_xlabel('Ξενοδοχείο')
+    ax2.set_ylabel('Ποσοστό Ακυρώσεων')
+    ax2.set_title('Ακυρώσεις ανά Ξενοδοχείο')
+
+    for bar in bars2:
+        height = bar.get_height()
+        ax2.annotate(f'{height:.2f}%', 
+                    xy=(bar.get_x() + bar.get_width() / 2, height), 
+                    xytext=(0, 3), 
+                    textcoords="offset points", 
+                    ha='center', va='bottom')
+
+    fig.tight_layout()
+    return fig
+
+def _group_extremes(df, column, seen, weight=None):
+    # Most and least frequent value of `column` per hotel, from a single grouped count (of `weight` when given).
+    # Ties go to the value seen first (smallest `seen`), like value_counts().idxmax()/idxmin() on the raw rows.
+    rows = df[['hotel', column]].assign(count=df[weight] if weight else 1, seen=seen)
+    stats = rows.groupby(['hotel', column], observed=True).agg(count=('count', 'sum'), seen=('seen', 'min'))
+    stats = stats[stats['count'] > 0].sort_values('seen', kind='stable')
+    by_hotel = stats['count'].groupby(level='hotel', observed=True, sort=False)
+    return by_hotel.idxmax().map(lambda key: key[1]), by_hotel.idxmin().map(lambda key: key[1])
+
+def booking_distribution_summary(df, weight=None, first_seen=None):
+    """
+    Busiest and quietest month, season, room type and party type per hotel, one row per hotel in order of first
+    appearance. Ties go to the value that appears first. Bookings that fit no party type are ignored for the client
+    columns; a hotel without any gets 'N/A'.
+
+    `weight` names a column holding the number of bookings per row and `first_seen` one holding the position of the
+    first of them (e.g. the smallest booking id), for pre-aggregated rows such as the cube. Without `first_seen` the
+    rows are taken to be in booking order.
+    """
+    df = add_derived_columns(df, ['season', 'party_type'])
+    seen = df[first_seen].to_numpy() if first_seen else np.arange(len(df))
+    first = pd.Series(seen, index=df.index).groupby(df['hotel'], observed=True).min().sort_values(kind='stable')
+    hotels = pd.Index(first.index.astype(object), name='hotel')
+    max_min_data = pd.DataFrame(index=hotels)
+
+    clients = (df['party_type'] != OTHER_PARTY).to_numpy()
+    dimensions = [
+        ('month', 'arrival_date_month', df, seen),
+        ('season', 'season', df, seen),
+        ('room_type', 'reserved_room_type', df, seen),
+        ('client_type', 'party_type', df[clients], seen[clients]),
+    ]
+    for name, column, rows, rows_seen in dimensions:
+        max_values, min_values = _group_extremes(rows, column, rows_seen, weight)
+        max_min_data[f'max_{name}'] = max_values.reindex(hotels).to_numpy(dtype=object)
+        max_min_data[f'min_{name}'] = min_values.reindex(hotels).to_numpy(dtype=object)
+
+    max_min_data[['max_client_type', 'min_client_type']] = max_min_data[['max_client_type', 'min_client_type']].fillna('N/A')
+    return max_min_data.reset_index()
+
+def plot_monthly_distribution(monthly, new_figure=Figure):
+    booking_dist = monthly.set_index(['hotel', 'arrival_date_month'])['bookings'].unstack(fill_value=0).reindex(columns=[
+        'January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December'
+    ], fill_value=0)
+
+    hotels = booking_dist.index
+    fig = new_figure(figsize=(5, 3 * len(hotels)))
+    axes = fig.subplots(len(hotels), 1)
+
+    if len(hotels) == 1:
+        axes = [axes]
+
+    for ax, hotel in zip(axes, hotels):
+        bars = ax.bar(booking_dist.columns, booking_dist.loc[hotel], color='skyblue')
+        ax.set_xlabel('Μήνας')
+        ax.set_ylabel('Αριθμός Κρατήσεων')
+        ax.set_title(f'Μηνιαία Κατανομή Κρατήσεων για το {hotel}')
+        ax.tick_params(axis='x', rotation=45)
+
+        for bar in bars:
+            height = bar.get_height()
+            ax.annotate(f'{height:.0f}', 
+                        xy=(bar.get_x() + bar.get_width() / 2, height), 
+                        xytext=(0, 3), 
+                        textcoords="offset points", 
+                        ha='center', va='top', rotation=90)
+
+    fig.tight_layout()
+    return fig
+
+def plot_seasonal_distribution(seasonal, new_figure=Figure):
+    booking_dist = seasonal.set_index(['hotel', 'season'])['bookings'].unstack(fill_value=0)
+
+    hotels = booking_dist.index
+    fig = new_figure(figsize=(5, 3 * len(hotels)))
+    axes = fig.subplots(len(hotels), 1)
+
+    if len(hotels) == 1:
+        axes = [axes]
+
+    for ax, hotel in zip(axes, hotels):
+        bars = ax.bar(booking_dist.columns, booking_dist.loc[hotel], color='skyblue')
+        ax.set_xlabel('Εποχή')
+        ax.set_ylabel('Αριθμός Κρατήσεων')
+        ax.set_title(f'Κατανομή Κρατήσεων ανά εποχή για το {hotel}')
+        ax.tick_params(axis='x', rotation=45)
+
+        for bar in bars:
+            height = bar.get_height()
+            ax.annotate(f'{height:.0f}', 
+                        xy=(bar.get_x() + bar.get_width() / 2, height), 
+                        xytext=(0, 3), 
+                        textcoords="offset points", 
+                        ha='center', va='bottom', rotation=30)
+
+    fig.tight_layout()
+    return fig
+
+def plot_room_type_distribution(room_types, new_figure=Figure):
+    booking_dist = room_types.set_index(['hotel', 'reserved_room_type'])['bookings'].unstack(fill_value=0)
+
+    hotels = booking_dist.index
+    fig = new_figure(figsize=(5, 3 * len(hotels)))
+    axes = fig.subplots(len(hotels), 1)
+
+    if len(hotels) == 1:
+        axes = [axes]
+
+    for ax, hotel in zip(axes, hotels):
+        bars = ax.bar(booking_dist.columns, booking_dist.loc[hotel], color='skyblue')
+        ax.set_xlabel('Τύπος Δωματίου')
+        ax.set_ylabel('Αριθμός Κρατήσεων')
+        ax.set_title(f'Κατανομή Κρατήσεων ανά τύπο δωματίου για το {hotel}')
+        ax.tick_params(axis='x', rotation=45)
+
+        for bar in bars:
+            height = bar.get_height()
+            ax.annotate(f'{height:.0f}', 
+                        xy=(bar.get_x() + bar.get_width() / 2, height), 
+                        xytext=(0, 3), 
+                        textcoords="offset points", 
+                        ha='center', va='bottom', rotation=0)
+
+    fig.tight_layout()
+    return fig
+
+def plot_client_distribution(client_types, new_figure=Figure):
+    client_types = client_types[client_types['party_type'] != OTHER_PARTY]
+
+    hotels = client_types['hotel'].unique()
+    hotel1_stats = client_types[client_types['hotel'] == hotels[0]].set_index('party_type')['bookings']
+    hotel2_stats = client_types[client_types['hotel'] == hotels[1]].set_index('party_type')['bookings']
+
+    fig = new_figure(figsize=(11, 5))
+    axes = fig.subplots(nrows=1, ncols=2)
+    axes[0].bar(hotel1_stats.index, hotel1_stats.values, color='lightcoral')
+    axes[0].set_xlabel('Τύπος Πελάτη')
+    axes[0].set_ylabel('Αριθμός Κρατήσεων')
+    axes[0].set_title(f'Κατανομή Κρατήσεων ανά τύπο πελάτη ({hotels[0]})')
+
+    axes[1].bar(hotel2_stats.index, hotel2_stats.values, color='lightcoral')
+    axes[1].set_xlabel('Τύπος Πελάτη')
+    axes[1].set_ylabel('Αριθμός Κρατήσεων')
+    axes[1].set_title(f'Κατανομή Κρατήσεων ανά τύπο πελάτη ({hotels[1]})')
+
+    for ax in axes:
+        for bar in ax.patches:
+            height = bar.get_height()
+            ax.annotate(f'{height:.0f}', 
+                        xy=(bar.get_x() + bar.get_width() / 2, height), 
+                        xytext=(0, 3), 
+                        textcoords="offset points", 
+                        ha='center', va='top', rotation=90)
+
+    fig.tight_layout()
+    return fig
+
+# Above this many points per line the markers are dropped, they would only blur the line
+MARKER_LIMIT = 60
+
+def _plot_time_trends(trends, column, label, date_format, new_figure=Figure, tick_step=None):
+    # Bookings, cancellations and average nights over time, one row of plots per hotel
+    hotels = trends['hotel'].unique()
+    fig = new_figure(figsize=(11, 7))
+    axes = fig.subplots(nrows=2, ncols=3)
+    panels = [
+        ('bookings', 'o', '-', 'purple', 'Αριθμός Κρατήσεων', 'Κρατήσεις του ({})'),
+        ('cancellations', 'x', '--', 'red', 'Αριθμός Ακυρώσεων', 'Ακυρώσεις του ({})'),
+        ('average_nights', 's', '-', 'blue', 'Μέση διάρκεια παραμονής (νύχτες)', 'Μέση διάρκεια παραμονής ({})'),
+    ]
+    for (metric, marker, linestyle, color, ylabel, title), column_axes in zip(panels, axes.T):
+        for ax, hotel in zip(column_axes, hotels):
+            series = trends[trends['hotel'] == hotel]
+            step = tick_step or max(1, len(series) // 8)
+            x, y = downsample_series(ax, series[column], series[metric])
+            ax.plot(x, y, marker=marker if len(series) <= MARKER_LIMIT else None, linestyle=linestyle, color=color)
+            ax.set_xticks(series[column][::step])  # Show fewer x-ticks
+            ax.set_xticklabels(series[column].dt.strftime(date_format)[::step], rotation=30, ha='right')
+            ax.set_xlabel(label)
+            ax.set_ylabel(ylabel)
+            ax.set_title(title.format(hotel))
+    fig.tight_layout()
+    return fig
+
+def plot_monthly_trends(trends, new_figure=Figure):
+    return _plot_time_trends(trends, 'arrival_date', 'Μήνας', '%b %Y', new_figure, tick_step=3)
+
+def plot_weekly_trends(trends, new_figure=Figure):
+    return _plot_time_trends(trends, 'arrival_week', 'Εβδομάδα', '%d %b %Y', new_figure)
+
+def plot_daily_trends(trends, new_figure=Figure):
+    return _plot_time_trends(trends, 'arrival_day', 'Ημέρα', '%d %b %Y', new_figure)
+
+def plot_yearly_trends(trends, new_figure=Figure):
+    hotels = trends['hotel'].unique()
+    fig = new_figure(figsize=(11, 7))
+    axes = fig.subplots(nrows=2, ncols=3)
+    # booking trends
+    for ax, hotel in zip(axes[:, 0], hotels):
+        yearly = trends[trends['hotel'] == hotel]
+        ax.plot(yearly['arrival_date_year'], yearly['bookings'], marker='o', linestyle='-', color='purple')
+        ax.set_xticks(yearly['arrival_date_year'])  # Show fewer x-ticks
+        ax.set_xticklabels(yearly['arrival_date_year'], rotation=30, ha='right')
+        ax.set_xlabel('Έτος')
+        ax.set_ylabel('Αριθμός Κρατήσεων')
+        ax.set_title(f'Κρατήσεις του ({hotel})')
+    # cancellation trends
+    for ax, hotel in zip(axes[:, 1], hotels):
+        yearly = trends[trends['hotel'] == hotel]
+        ax.plot(yearly['arrival_date_year'], yearly['cancellations'], marker='x', linestyle='--', color='red')
+        ax.set_xticks(yearly['arrival_date_year'])  # Show fewer x-ticks
+        ax.set_xticklabels(yearly['arrival_date_year'], rotation=30, ha='right')
+        ax.set_xlabel('Έτος')
+        ax.set_ylabel('Αριθμός Ακυρώσεων')
+        ax.set_title(f'Ακυρώσεις του ({hotel})')
+    # average booking length
+    for ax, hotel in zip(axes[:, 2], hotels):
+        yearly = trends[trends['hotel'] == hotel]
+        ax.plot(yearly['arrival_date_year'], yearly['average_nights'], marker='s', linestyle='-', color='blue')
+        ax.set_xticks(yearly['arrival_date_year'])  # Show fewer x-ticks
+        ax.set_xticklabels(yearly['arrival_date_year'], rotation=30, ha='right')
+        ax.set_xlabel('Έτος')
+        ax.set_ylabel('Μέση διάρκεια παραμονής (νύχτες)')
+        ax.set_title(f'Μέση διάρκεια παραμονής ({hotel})')
+    fig.tight_layout()
+    return fig
+
+def plot_seasonal_trends(trends, new_figure=Figure):
+    hotels = trends['hotel'].unique()
+
+    fig = new_figure(figsize=(11, 7))
+    axes = fig.subplots(nrows=2, ncols=3)
+    #  booking trends
+    for ax, hotel in zip(axes[:, 0], hotels):
+        seasonal = trends[trends['hotel'] == hotel]
+        ax.plot(seasonal['season'], seasonal['bookings'], marker='o', linestyle='-', color='purple')
+        ax.set_xticks(seasonal['season'])  # Show fewer x-ticks
+        ax.set_xticklabels(seasonal['season'], rotation=30, ha='right')
+        ax.set_xlabel('Εποχή')
+        ax.set_ylabel('Αριθμός Κρατήσεων')
+        ax.set_title(f'Κρατήσεις του ({hotel})')
+    # cancellation trends
+    for ax, hotel in zip(axes[:, 1], hotels):
+        seasonal = trends[trends['hotel'] == hotel]
+        ax.plot(seasonal['season'], seasonal['cancellations'], marker='x', linestyle='--', color='red')
+        ax.set_xticks(seasonal['season'])  # Show fewer x-ticks
+        ax.set_xticklabels(seasonal['season'], rotation=30, ha='right')
+        ax.set_xlabel('Εποχή')
+        ax.set_ylabel('Αριθμός Ακυρώσεων')
+        ax.set_title(f'Ακυρώσεις του ({hotel})')
+    # average booking length
+    for ax, hotel in zip(axes[:, 2], hotels):
+        seasonal = trends[trends['hotel'] == hotel]
+        ax.plot(seasonal['season'], seasonal['average_nights'], marker='s', linestyle='-', color='blue')
+        ax.set_xticks(seasonal['season'])  # Show fewer x-ticks
+        ax.set_xticklabels(seasonal['season'], rotation=30, ha='right')
+        ax.set_xlabel('Εποχή')
+        ax.set_ylabel('Μέση διάρκεια παραμονής (νύχτες)')
+        ax.set_title(f'Μέση διάρκεια παραμονής ({hotel})')
+
+    fig.tight_layout()
+    return fig
+
+def plot_comparative_trends(trends, new_figure=Figure):
+    hotels = trends['hotel'].unique()
+
+    hotel1, hotel2 = hotels[0], hotels[1]
+
+    hotel1_trends = trends[trends['hotel'] == hotel1].set_index('arrival_date')
+    hotel2_trends = trends[trends['hotel'] == hotel2].set_index('arrival_date')
+
+    percentage_diff_bookings = ((hotel1_trends['bookings'] - hotel2_trends['bookings']) / hotel2_trends['bookings']) * 100
+    percentage_diff_cancellations = ((hotel1_trends['cancellations'] - hotel2_trends['cancellations']) / hotel2_trends['cancellations']) * 100
+    percentage_diff_avg_nights = ((hotel1_trends['average_nights'] - hotel2_trends['average_nights']) / hotel2_trends['average_nights']) * 100
+
+    fig = new_figure(figsize=(13, 5))
+    axes = fig.subplots(nrows=1, ncols=3)
+
+    x, y = downsample_series(axes[0], percentage_diff_bookings.index, percentage_diff_bookings.values)
+    axes[0].plot(x, y, marker='o' if len(percentage_diff_bookings) <= MARKER_LIMIT else None, linestyle='-', color='purple')
+    axes[0].set_xticks(percentage_diff_bookings.index[::3])
+    axes[0].set_xticklabels(percentage_diff_bookings.index.strftime('%b %Y')[::3], rotation=30, ha='right')
+    axes[0].set_xlabel('Μήνας')
+    axes[0].set_ylabel('Ποσοστιαία διαφορά (%)')
+    axes[0].set_title('διαφορά% κρατήσεων')
+    x, y = downsample_series(axes[1], percentage_diff_cancellations.index, percentage_diff_cancellations.values)
+    axes[1].plot(x, y, marker='x' if len(percentage_diff_cancellations) <= MARKER_LIMIT else None, linestyle='--', color='red')
+    axes[1].set_xticks(percentage_diff_cancellations.index[::3])
+    axes[1].set_xticklabels(percentage_diff_cancellations.index.strftime('%b %Y')[::3], rotation=30, ha='right')
+    axes[1].set_xlabel('Μήνας')
+    axes[1].set_ylabel('Ποσοστιαία διαφορά (%)')
+    axes[1].set_title('διαφορά% ακυρώσεων')
+    x, y = downsample_series(axes[2], percentage_diff_avg_nights.index, percentage_diff_avg_nights.values)
+    axes[2].plot(x, y, marker='s' if len(percentage_diff_avg_nights) <= MARKER_LIMIT else None, linestyle='-', color='blue')
+    axes[2].set_xticks(percentage_diff_avg_nights.index[::3])
+    axes[2].set_xticklabels(percentage_diff_avg_nights.index.strftime('%b %Y')[::3], rotation=30, ha='right')
+    axes[2].set_xlabel('Μήνας')
+    axes[2].set_ylabel('Ποσοστιαία διαφορά (%)')
+    axes[2].set_title('διαφορά% μέσης διάρκειας παραμονής')
+
+    fig.tight_layout()
+    return fig
+
+def plot_seasonality(seasonality, new_figure=Figure):
+    month_order = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
+    hotels = seasonality['hotel'].unique()
+
+    fig = new_figure(figsize=(11, 7))
+    axs = fig.subplots(2, 2)
+
+    # Plots Bookings x Cancelations for both hotels
+    seasonality_1 = seasonality[seasonality['hotel'] == hotels[0]].set_index('arrival_date_month').reindex(month_order, fill_value=0)
+    axs[0, 0].plot(seasonality_1.index, seasonality_1['bookings'], color='seagreen', alpha=0.6, marker='*')
+    axs[0, 0].set_title(f'Seasonality in Bookings for {hotels[0]}')
+    axs[0, 0].set_xlabel('Month')
+    axs[0, 0].set_ylabel('Number of Bookings')
+    axs[0, 0].tick_params(axis='x', rotation=45)
+    axs[0, 1].plot(seasonality_1.index, seasonality_1['cancellations'], color='red', marker='o')
+    axs[0, 1].set_title(f'Seasonality in Cancellations for {hotels[0]}')
+    axs[0, 1].set_xlabel('Month')
+    axs[0, 1].set_ylabel('Number of Cancellations')
+    axs[0, 1].tick_params(axis='x', rotation=45)
+
+    seasonality_2 = seasonality[seasonality['hotel'] == hotels[1]].set_index('arrival_date_month').reindex(month_order, fill_value=0)
+    axs[1, 0].plot(seasonality_2.index, seasonality_2['bookings'], color='seagreen', alpha=0.6, marker='*')
+    axs[1, 0].set_title(f'Seasonality in Bookings for {hotels[1]}')
+    axs[1, 0].set_xlabel('Month')
+    axs[1, 0].set_ylabel('Number of Bookings')
+    axs[1, 0].tick_params(axis='x', rotation=45)
+    axs[1, 1].plot(seasonality_2.index, seasonality_2['cancellations'], color='red', marker='o')
+    axs[1, 1].set_title(f'Seasonality in Cancellations for {hotels[1]}')
+    axs[1, 1].set_xlabel('Month')
+    axs[1, 1].set_ylabel('Number of Cancellations')
+    axs[1, 1].tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    return fig
+
+
+# Option -> (analysis, figure builder, plot file); the option strings are the ones offered in the main menu
+DISTRIBUTION_OPTIONS = {
+    'ανά μήνα': (MONTHLY_DISTRIBUTION, plot_monthly_distribution, 'monthly_distribution.png'),
+    'ανά εποχή': (SEASONAL_DISTRIBUTION, plot_seasonal_distribution, 'seasonal_distribution.png'),
+    'ανά τύπο δωματίου': (ROOM_TYPE_DISTRIBUTION, plot_room_type_distribution, 'room_type_distribution.png'),
+    'ανά πελάτη': (CLIENT_DISTRIBUTION, plot_client_distribution, 'client_statistics.png'),
+}
+
+TREND_OPTIONS = {
+    'ημερήσιες τάσεις': (DAILY_TRENDS, plot_daily_trends, 'daily_booking_trends.png'),
+    'εβδομαδιαίες τάσεις': (WEEKLY_TRENDS, plot_weekly_trends, 'weekly_booking_trends.png'),
+    'μηνιαίες τάσεις': (MONTHLY_TRENDS, plot_monthly_trends, 'monthly_booking_trends.png'),
+    'ετήσιες τάσεις': (YEARLY_TRENDS, plot_yearly_trends, 'yearly_booking_trends.png'),
+    'εποχιακές τάσεις': (SEASONAL_TRENDS, plot_seasonal_trends, 'seasonal_booking_trends.png'),
+    'συγκριτικές τάσεις': (MONTHLY_TRENDS, plot_comparative_trends, 'comparative_booking_trends.png'),
+}
+
+
+# Data steps: (option, date range, bookings) -> (frame behind the page's table, frame the figure is built from)
+def basic_statistics_data(option, date_min=None, date_max=None, df=None):
+    basic_stats = run_analysis(BASIC_STATISTICS, date_min, date_max, df=df)
+    basic_stats['cancellation_percentage'] = basic_stats['cancellation_rate'] * 100
+    return basic_stats, basic_stats
+
+def booking_distribution_data(option, date_min=None, date_max=None, df=None):
+    cube = cube_frame(date_min, date_max) if df is None else None
+    if cube is not None:
+        max_min_data = booking_distribution_summary(cube, weight='bookings', first_seen='first_id')
+        distribution = run_analysis(DISTRIBUTION_OPTIONS[option][0], date_min, date_max)
+        return max_min_data, distribution
+
+    if df is None:
+        df = load_bookings(DISTRIBUTION_COLUMNS, date_min, date_max)
+    else:
+        # Frames from load_bookings() already carry the derived features
+        df = df[DISTRIBUTION_COLUMNS]
+    max_min_data = booking_distribution_summary(df)
+    distribution = run_analysis(DISTRIBUTION_OPTIONS[option][0], date_min, date_max, df=df)
+    return max_min_data, distribution
+
+def booking_trends_data(option, date_min=None, date_max=None, df=None):
+    trends = run_analysis(TREND_OPTIONS[option][0], date_min, date_max, df=df)
+    return trends, trends
+
+def seasonality_data(option, date_min=None, date_max=None, df=None):
+    seasonality = run_analysis(SEASONALITY, date_min, date_max, df=df)
+    return seasonality, seasonality
+
+
+# Page -> (data step, {option: (analysis, figure builder, plot file)}, summary table uploaded by the page)
+VIEWS = {
+    'basic_statistics': (basic_statistics_data, {None: (BASIC_STATISTICS, plot_basic_statistics, 'basic_statistics.png')}, 'basic_statistics'),
+    'booking_distribution': (booking_distribution_data, DISTRIBUTION_OPTIONS, 'booking_distribution'),
+    'booking_trends': (booking_trends_data, TREND_OPTIONS, None),
+    'seasonality': (seasonality_data, {None: (SEASONALITY, plot_seasonality, 'seasonality.png')}, None),
+}
+
+
+def view_columns(page, option=None):
+    # Bookings columns the view reads
+    if page == 'booking_distribution':
+        return DISTRIBUTION_COLUMNS
+    return VIEWS[page][1][option][0].columns
+
+def build_view(page, option=None, date_min=None, date_max=None, df=None, new_figure=Figure):
+    """
+    Compute one page of the GUI and build its figure.
+
+    Parameters:
+    - page (str): Key of VIEWS.
+    - option (str): The page option (None for pages without options).
+    - date_min, date_max: Optional arrival date range, applied only when both are given.
+    - df (DataFrame): Already loaded and range-filtered bookings; loaded via load_bookings() when omitted.
+    - new_figure (callable): Figure factory called with figsize=.
+
+    Returns (data, figure, plot file name), where data is the frame behind the page's table or plot.
+    """
+    data_step, options, table = VIEWS[page]
+    # One data version lookup for every cache and load of the data step
+    with pinned_data_version(), span('data_step', page=page, option=option) as current:
+        data, plot_data = data_step(option, date_min, date_max, df)
+        current.record(data)
+    analysis, plot, plot_file = options[option]
+    with span('build_figure'):
+        fig = plot(plot_data, new_figure)
+    return data, fig, plot_file